@@ -0,0 +1,153 @@
+from bisect import bisect_left, bisect_right
+from threading import Lock
+
+from django.db import connection
+
+from api.serializers import IngredientSerializer
+from recipes.models import CatalogueVersion, Ingredient
+
+MAX_CHARACTER = chr(0x10FFFF)
+
+
+class IngredientPrefixIndex:
+    '''Индекс названий ингредиентов в памяти процесса.
+
+    Названия хранятся отсортированными, поэтому совпадения по началу
+    названия находятся бинарным поиском. Для поиска по вхождению названия
+    склеены в одну строку, по которой ищет str.find.
+    '''
+
+    def __init__(self, ingredients):
+        entries = sorted(
+            (name.casefold(), ingredient_id)
+            for ingredient_id, name in ingredients
+        )
+        self.names = [name for name, _ in entries]
+        self.ids = [ingredient_id for _, ingredient_id in entries]
+        self.offsets = []
+        offset = 0
+        for name in self.names:
+            self.offsets.append(offset)
+            offset += len(name) + 1
+        self.haystack = '\n'.join(self.names)
+
+    def search(self, query, limit):
+        query = query.casefold()
+        if not query or '\n' in query:
+            return []
+        prefix_start = bisect_left(self.names, query)
+        prefix_end = bisect_left(self.names, query + MAX_CHARACTER)
+        ids = self.ids[prefix_start:min(prefix_end, prefix_start + limit)]
+        position = self.haystack.find(query)
+        while position != -1 and len(ids) < limit:
+            index = bisect_right(self.offsets, position) - 1
+            if prefix_start <= index < prefix_end:
+                index = prefix_end - 1
+            else:
+                ids.append(self.ids[index])
+            if index + 1 == len(self.offsets):
+                break
+            position = self.haystack.find(query, self.offsets[index + 1])
+        return ids
+
+
+class IngredientCatalogue:
+
+    def __init__(self, version, ingredients):
+        self.version = version
+        self.ingredients = ingredients
+        self.ingredients_by_id = {
+            ingredient['id']: ingredient for ingredient in ingredients
+        }
+        self.index = IngredientPrefixIndex(
+            (ingredient['id'], ingredient['name'])
+            for ingredient in ingredients
+        )
+
+    def get(self, ingredient_id):
+        return self.ingredients_by_id.get(ingredient_id)
+
+    def search(self, query, limit):
+        # На PostgreSQL названия ищутся по индексам pg_trgm и
+        # text_pattern_ops, а каталог только отдаёт найденные ингредиенты.
+        if connection.vendor == 'postgresql':
+            ids = search_ingredient_ids_in_db(query, limit)
+        else:
+            ids = self.index.search(query, limit)
+        return [
+            self.ingredients_by_id[ingredient_id] for ingredient_id in ids
+            if ingredient_id in self.ingredients_by_id
+        ]
+
+
+class IngredientCatalogueCache:
+    '''Каталог ингредиентов, сериализованный в памяти процесса.
+
+    Перед каждым обращением сверяет версию каталога в БД и лениво
+    перечитывает его, если версия изменилась в любом из процессов.
+    '''
+
+    def __init__(self):
+        self.catalogue = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def get(self):
+        version = CatalogueVersion.get_current()
+        catalogue = self.catalogue
+        if catalogue is not None and catalogue.version == version:
+            self.hits += 1
+            return catalogue
+        with self.lock:
+            self.misses += 1
+            if self.catalogue is None or self.catalogue.version != version:
+                self.catalogue = IngredientCatalogue(
+                    version, self.load_ingredients()
+                )
+            return self.catalogue
+
+    def load_ingredients(self):
+        return [
+            dict(ingredient) for ingredient in IngredientSerializer(
+                Ingredient.objects.select_related('measurement_unit')
+                .order_by('id'),
+                many=True
+            ).data
+        ]
+
+    def clear(self):
+        self.catalogue = None
+
+    def get_stats(self):
+        requests = self.hits + self.misses
+        return {
+            'version': (
+                None if self.catalogue is None else self.catalogue.version
+            ),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else None,
+        }
+
+
+ingredient_catalogue = IngredientCatalogueCache()
+
+
+def search_ingredient_ids_in_db(query, limit):
+    ingredients = Ingredient.objects.order_by('name').values_list(
+        'id', flat=True
+    )
+    ids = list(ingredients.filter(name__istartswith=query)[:limit])
+    if len(ids) < limit:
+        ids.extend(
+            ingredients.filter(name__icontains=query)
+            .exclude(name__istartswith=query)[:limit - len(ids)]
+        )
+    return ids
+
+
+def search_ingredient_ids(query, limit):
+    if connection.vendor == 'postgresql':
+        return search_ingredient_ids_in_db(query, limit)
+    return ingredient_catalogue.get().index.search(query, limit)
@@ -0,0 +1,43 @@
+import hashlib
+from functools import wraps
+from http import HTTPStatus
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def conditional_get(state_func):
+    '''Условный GET для методов ViewSet.
+
+    state_func(view, request, *args, **kwargs) возвращает пару
+    (state, last_modified): ETag строится из state без вызова
+    сериализатора. Если state равен None, запрос обрабатывается
+    без проверки условий.
+    '''
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            state, last_modified = state_func(self, request, *args, **kwargs)
+            if state is None:
+                return view_method(self, request, *args, **kwargs)
+            etag = quote_etag(
+                hashlib.sha256(repr(state).encode()).hexdigest()
+            )
+            timestamp = (
+                int(last_modified.timestamp()) if last_modified else None
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+            if response.status_code in (
+                HTTPStatus.OK, HTTPStatus.NOT_MODIFIED
+            ):
+                if not response.has_header('ETag'):
+                    response['ETag'] = etag
+                if timestamp and not response.has_header('Last-Modified'):
+                    response['Last-Modified'] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
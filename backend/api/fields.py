@@ -1,13 +1,129 @@
-import base64
+import re
+from binascii import Error as BinasciiError
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
+from PIL import Image
 from rest_framework import serializers
 
+from core.utils import get_base64_decoded_size, iter_base64_chunks
+from recipes.models import Recipe
+
+
+def get_image_url(name, request=None):
+    url = Recipe._meta.get_field('image').storage.url(name)
+    if request is None:
+        return url
+    return request.build_absolute_uri(url)
+
 
 class Base64ImageField(serializers.ImageField):
+    '''Принимает картинку в формате data URL.
+
+    Тип и размер картинки проверяются до декодирования, сигнатура
+    содержимого — по первой части. base64 декодируется частями во
+    временный файл, поэтому память не зависит от размера картинки.
+    '''
+    default_error_messages = {
+        'invalid_data_url': 'Картинка должна быть в формате '
+                            'data:<тип>;base64,<данные>.',
+        'invalid_base64': 'Содержимое картинки не является base64.',
+        'invalid_mime_type': 'Неподдерживаемый тип картинки {mime_type}.',
+        'mime_type_mismatch': 'Содержимое картинки не соответствует '
+                              'типу {mime_type}.',
+        'max_size': 'Размер картинки не должен превышать {max_size} байт.',
+    }
+    data_url_separator = ';base64,'
+
     def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-        return super().to_internal_value(data)
+        if not (isinstance(data, str) and data.startswith('data:')):
+            return super().to_internal_value(data)
+        image = self.decode_data_url(data)
+        try:
+            with Image.open(image) as pillow_image:
+                pillow_image.verify()
+        except Exception:
+            image.close()
+            self.fail('invalid_image')
+        image.seek(0)
+        return image
+
+    def decode_data_url(self, data):
+        header_end = data.find(self.data_url_separator, 0, 100)
+        if header_end == -1:
+            self.fail('invalid_data_url')
+        mime_type = data[len('data:'):header_end]
+        signature = settings.RECIPE_IMAGE_MIME_TYPES.get(mime_type)
+        if signature is None:
+            self.fail('invalid_mime_type', mime_type=mime_type)
+        start = header_end + len(self.data_url_separator)
+        try:
+            size = get_base64_decoded_size(data, start)
+        except ValueError:
+            self.fail('invalid_base64')
+        if size > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.fail('max_size', max_size=settings.RECIPE_IMAGE_MAX_SIZE)
+        file = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        try:
+            self.write_chunks(file, data, start, mime_type, signature)
+        except serializers.ValidationError:
+            file.close()
+            raise
+        file.seek(0)
+        image = File(file, name=f'image.{mime_type.split("/")[-1]}')
+        image.size = size
+        return image
+
+    def write_chunks(self, file, data, start, mime_type, signature):
+        try:
+            for chunk in iter_base64_chunks(data, start):
+                if not file.tell() and not re.match(
+                    signature, chunk, re.DOTALL
+                ):
+                    self.fail('mime_type_mismatch', mime_type=mime_type)
+                file.write(chunk)
+        except BinasciiError:
+            self.fail('invalid_base64')
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    '''URL вариантов картинки рецепта по размерам и форматам или None,
+    пока картинка обрабатывается.'''
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'image_variants')
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        if not variants:
+            return None
+        request = self.context.get('request')
+        return {
+            variant: {
+                extension: get_image_url(name, request)
+                for extension, name in files.items()
+            }
+            for variant, files in variants.items()
+        }
+
+
+class ImageVariantField(serializers.ReadOnlyField):
+    '''URL одного варианта картинки рецепта, а пока картинка
+    обрабатывается, URL исходного файла.'''
+
+    def __init__(self, variant, extension='jpeg', **kwargs):
+        self.variant = variant
+        self.extension = extension
+        kwargs.setdefault('source', '*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        name = recipe.image_variants.get(self.variant, {}).get(
+            self.extension, recipe.image.name
+        )
+        if not name:
+            return None
+        return get_image_url(name, self.context.get('request'))
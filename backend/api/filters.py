@@ -1,8 +1,20 @@
+from django.conf import settings
+from django.db.models import Case, Exists, OuterRef, When
 from django_filters.rest_framework import FilterSet, filters
 
+from api.catalogue import search_ingredient_ids
+
 from recipes.models import Ingredient, Recipe, Tag
 
 
+RECIPE_ORDERINGS = {
+    '-pub_date': ('-pub_date', '-id'),
+    '-popularity': (
+        '-favorites_count', '-in_carts_count', '-pub_date', '-id'
+    ),
+}
+
+
 class RecipeFilter(FilterSet):
     is_favorited = filters.BooleanFilter(
         method='is_favorited_filter')
@@ -12,12 +24,33 @@ class RecipeFilter(FilterSet):
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
+        method='tags_filter',
+    )
+    ordering = filters.ChoiceFilter(
+        choices=(
+            ('-pub_date', 'по дате публикации'),
+            ('-popularity', 'по популярности'),
+        ),
+        method='ordering_filter',
     )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author',)
 
+    def tags_filter(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                tag__in=value,
+            )
+        ))
+
+    def ordering_filter(self, queryset, name, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
+
     def is_favorited_filter(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
             return queryset.filter(favorite__user=self.request.user)
@@ -29,24 +62,29 @@ class RecipeFilter(FilterSet):
         return queryset
 
     def filter_queryset(self, queryset):
-        tags = self.request.query_params.getlist('tags')
-        shopping_cart = self.request.query_params.getlist(
-            'is_in_shopping_cart'
-        )
-        if (
-            not (
-                self.request.parser_context.get('kwargs')
-                or tags
-                or shopping_cart
-            )
+        if not (
+            self.request.parser_context.get('kwargs')
+            or 'tags' in self.data
+            or 'is_in_shopping_cart' in self.data
         ):
             return Recipe.objects.none()
         return super().filter_queryset(queryset)
 
 
 class IngredientFilter(FilterSet):
-    name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    name = filters.CharFilter(method='name_filter')
 
     class Meta:
         model = Ingredient
         fields = ('name',)
+
+    def name_filter(self, queryset, name, value):
+        ids = search_ingredient_ids(
+            value, settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+        )
+        if not ids:
+            return queryset.none()
+        return queryset.filter(id__in=ids).order_by(Case(*(
+            When(id=ingredient_id, then=position)
+            for position, ingredient_id in enumerate(ids)
+        )))
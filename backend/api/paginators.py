@@ -1,6 +1,152 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+class KeysetPagination(BasePagination):
+    '''Пагинация по курсору на паре (pub_date, id) в порядке убывания.
+
+    Курсор хранит позицию последнего (или первого для предыдущей
+    страницы) рецепта, поэтому глубина страницы не влияет на стоимость
+    запроса. Количество рецептов считается только по ?count=exact
+    или оценивается планировщиком по ?count=estimate.
+    '''
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count = self.get_count(queryset, request)
+        position, self.reverse = self.decode_cursor(request)
+        if self.reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        if position is not None:
+            pub_date, recipe_id = position
+            lookup = 'gt' if self.reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(pub_date=pub_date, **{f'id__{lookup}': recipe_id})
+            )
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = has_more if self.reverse else (
+            position is not None
+        )
+        if not results:
+            self.has_next = self.has_previous = False
+        self.results = results
+        return results
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            pub_date, recipe_id, reverse = json.loads(
+                urlsafe_b64decode(encoded.encode()).decode()
+            )
+            return (
+                (datetime.fromisoformat(pub_date), int(recipe_id)),
+                bool(reverse)
+            )
+        except (BinasciiError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, recipe, reverse):
+        encoded = urlsafe_b64encode(json.dumps(
+            (recipe.pub_date.isoformat(), recipe.id, reverse)
+        ).encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.results[-1], False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.results[0], True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
 
 
 class LimitPagination(PageNumberPagination):
 
     page_size_query_param = "limit"
+
+
+class RecipePagination(LimitPagination):
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_paginator = None
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        if request.query_params.get('ordering', '-pub_date') != '-pub_date':
+            raise ValidationError({
+                self.cursor_query_param: (
+                    'Пагинация по курсору доступна только для сортировки '
+                    'по дате публикации'
+                )
+            })
+        self.keyset_paginator = KeysetPagination(self.get_page_size(request))
+        return self.keyset_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
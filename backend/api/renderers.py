@@ -0,0 +1,97 @@
+import csv
+import json
+from abc import ABCMeta, abstractmethod
+
+from rest_framework.renderers import JSONRenderer
+
+from api.utils import get_shopping_cart_pdf
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(JSONRenderer, metaclass=ABCMeta):
+    '''Выбирает формат списка покупок по ?format= или заголовку Accept.
+
+    Потоковое содержимое отдаёт метод stream(), а render() используется
+    DRF только для ответов с ошибками, которые остаются в JSON.
+    '''
+    streaming = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return super().render(data, None, renderer_context)
+
+    @abstractmethod
+    def stream(self, ingredients, user):
+        '''Возвращает итератор частей списка покупок.'''
+
+
+class PDFShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    streaming = False
+
+    def stream(self, ingredients, user):
+        yield get_shopping_cart_pdf(user, ingredients)
+
+
+class CSVShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, ingredients, user):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'amount', 'measurement_unit'))
+        for ingredient in ingredients:
+            yield writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['total'],
+                ingredient['ingredient__measurement_unit__name'],
+            ))
+
+
+class TextShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def stream(self, ingredients, user):
+        yield f'Список покупок для пользователя {user.first_name}\n\n'
+        for ingredient in ingredients:
+            yield (
+                f'{ingredient["ingredient__name"]} - '
+                f'{ingredient["total"]} '
+                f'{ingredient["ingredient__measurement_unit__name"]}\n'
+            )
+
+
+class JSONShoppingCartRenderer(ShoppingCartRenderer):
+    format = 'json'
+
+    def stream(self, ingredients, user):
+        separator = '['
+        for ingredient in ingredients:
+            yield separator + json.dumps({
+                'name': ingredient['ingredient__name'],
+                'amount': ingredient['total'],
+                'measurement_unit': (
+                    ingredient['ingredient__measurement_unit__name']
+                ),
+            }, ensure_ascii=False)
+            separator = ','
+        yield ']' if separator == ',' else '[]'
+
+
+SHOPPING_CART_RENDERERS = (
+    PDFShoppingCartRenderer,
+    CSVShoppingCartRenderer,
+    TextShoppingCartRenderer,
+    JSONShoppingCartRenderer,
+)
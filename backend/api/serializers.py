@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
 from djoser.serializers import (
     UserCreateSerializer as DjoserUserCreateSerializer
 )
@@ -7,11 +8,13 @@ from djoser.serializers import UserSerializer as DjoserUserSerializer
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueTogetherValidator
 
-from api.fields import Base64ImageField
-from api.utils import collect_ingredientsrecipe_objects, collect_tags
+from api.fields import (
+    Base64ImageField, ImageVariantField, ImageVariantsField
+)
+from api.utils import collect_ingredientsrecipe_objects
 from recipes.models import (
     Favorite, Ingredient, IngredientRecipe, Purchase,
-    Recipe, Tag
+    Recipe, ShoppingCartExport, Tag
 )
 from users.models import Subscription
 
@@ -45,17 +48,22 @@ class UserSerializer(DjoserUserSerializer):
 
     def get_is_subscribed(self, obj):
         user = self.context['request'].user
-        return (
-            user.is_authenticated
-            and Subscription.objects.filter(user=user, author=obj).exists()
-        )
+        if user.is_anonymous:
+            return False
+        if 'subscriptions' not in self.context:
+            self.context['subscriptions'] = set(
+                Subscription.objects.filter(user=user).values_list(
+                    'author_id', flat=True
+                )
+            )
+        return obj.id in self.context['subscriptions']
 
 
 class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
-        fields = '__all__'
+        fields = ('id', 'name', 'color', 'slug')
         read_only_fields = ('id', 'name', 'color', 'slug')
 
     def to_internal_value(self, data):
@@ -90,13 +98,17 @@ class RecipeSerializer(serializers.ModelSerializer):
     author = UserSerializer(default=serializers.CurrentUserDefault())
     tags = TagSerializer(many=True)
     ingredients = IngredientRecipeSerializer(many=True, required=True)
-    is_favorited = serializers.SerializerMethodField()
-    is_in_shopping_cart = serializers.SerializerMethodField()
+    is_favorited = serializers.BooleanField(read_only=True, default=False)
+    is_in_shopping_cart = serializers.BooleanField(
+        read_only=True, default=False
+    )
     image = Base64ImageField()
+    images = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        exclude = ('pub_date', )
+        exclude = ('pub_date', 'image_variants', 'updated_at')
+        read_only_fields = ('favorites_count', 'in_carts_count')
         validators = [
             UniqueTogetherValidator(
                 queryset=Recipe.objects.all(),
@@ -104,26 +116,20 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
         ]
 
-    def is_authenticated(func):
-        def wrapper(self, obj):
-            if self.context.get('request').user.is_anonymous:
-                return False
-            return func(self, obj)
-        return wrapper
-
-    @is_authenticated
-    def get_is_in_shopping_cart(self, obj):
-        return Purchase.objects.filter(
-            user=self.context.get('request').user,
-            recipe=obj
-        ).exists()
-
-    @is_authenticated
-    def get_is_favorited(self, obj):
-        return Favorite.objects.filter(
-            user=self.context.get('request').user,
-            recipe=obj
-        ).exists()
+    @cached_property
+    def list_image(self):
+        '''Картинка рецепта в ленте: вариант card вместо full.'''
+        field = ImageVariantField('card')
+        field.bind('image', self)
+        return field
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        if getattr(self.context.get('view'), 'action', None) == 'list':
+            representation['image'] = self.list_image.to_representation(
+                instance
+            )
+        return representation
 
     def validate_ingredients(self, data):
         if len(data) == 0:
@@ -143,11 +149,13 @@ class RecipeSerializer(serializers.ModelSerializer):
                 raise ValidationError(
                     'Убедитесь, что значение указателя ингредиента больше 0'
                 )
-        if (
-            Ingredient.objects.filter(id__in=seen_ingredinets).count()
-            != len(seen_ingredinets)
-        ):
+        ingredients = Ingredient.objects.in_bulk(seen_ingredinets)
+        if len(ingredients) != len(seen_ingredinets):
             raise ValidationError('Указанного ингредиента не существует')
+        for ingredient in data:
+            ingredient['ingredient'] = ingredients[
+                ingredient['ingredient']['id']
+            ]
         return data
 
     def validate_tags(self, data):
@@ -160,12 +168,10 @@ class RecipeSerializer(serializers.ModelSerializer):
                 raise ValidationError(
                     'Убедитесь, что значение указателя тега больше 0'
                 )
-        if (
-            Tag.objects.filter(id__in=data).count()
-            != len(data)
-        ):
+        tags = Tag.objects.in_bulk(data)
+        if len(tags) != len(data):
             raise ValidationError('Указанного тега не существует')
-        return super().validate(data)
+        return [tags[tag_id] for tag_id in data]
 
     def validate_cooking_time(self, data):
         if data < 1:
@@ -177,16 +183,11 @@ class RecipeSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         tag_data = validated_data.pop('tags')
         ingredient_data = validated_data.pop('ingredients')
-        recipe = Recipe(**validated_data)
-        ingredientrecipe_objects = collect_ingredientsrecipe_objects(
-            ingredient_data, recipe
-        )
-        tags = collect_tags(tag_data)
-        recipe.save()
+        recipe = Recipe.objects.create(**validated_data)
         IngredientRecipe.objects.bulk_create(
-            ingredientrecipe_objects
+            collect_ingredientsrecipe_objects(ingredient_data, recipe)
         )
-        recipe.tags.set(tags)
+        recipe.tags.set(tag_data)
         return recipe
 
     def update(self, instance, validated_data):
@@ -200,8 +201,7 @@ class RecipeSerializer(serializers.ModelSerializer):
                 )
             )
         if 'tags' in validated_data:
-            tags = collect_tags(validated_data.pop('tags'))
-            instance.tags.set(tags)
+            instance.tags.set(validated_data.pop('tags'))
         super().update(instance, validated_data)
         return instance
 
@@ -209,7 +209,8 @@ class RecipeSerializer(serializers.ModelSerializer):
 class FavoritePurchaseSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='recipe.id')
     name = serializers.ReadOnlyField(source='recipe.name')
-    image = serializers.ImageField(source='recipe.image', read_only=True)
+    image = ImageVariantField('thumbnail', source='recipe')
+    images = ImageVariantsField(source='recipe.image_variants')
     cooking_time = serializers.ReadOnlyField(source='recipe.cooking_time')
 
     def to_representation(self, instance):
@@ -245,23 +246,30 @@ class PurchaseSerializer(FavoritePurchaseSerializer):
         ]
 
 
+class ShoppingCartExportSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ShoppingCartExport
+        fields = ('id', 'status', 'file', 'created')
+        read_only_fields = fields
+
+
 class RecipeShortSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(read_only=True)
+    image = ImageVariantField('thumbnail')
+    images = ImageVariantsField()
     name = serializers.ReadOnlyField()
     cooking_time = serializers.ReadOnlyField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'name',
-                  'image', 'cooking_time')
+                  'image', 'images', 'cooking_time')
 
 
 class SubscriptionSerializer(
     serializers.ModelSerializer
 ):
-    recipes_count = serializers.ReadOnlyField(
-        source='author.recipes.count'
-    )
+    recipes_count = serializers.IntegerField(read_only=True)
     recipes = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField()
     id = serializers.ReadOnlyField(source='author.id')
@@ -285,28 +293,7 @@ class SubscriptionSerializer(
         read_only_fields = fields
 
     def get_recipes(self, obj):
-        serializer = RecipeShortSerializer(obj.author.recipes, many=True)
-        request = self.context.get('request')
-        recipes_limit = (
-            request.parser_context['request'].
-            query_params.get('recipes_limit')
-        )
-        recipes = obj.author.recipes.all()
-        if recipes_limit:
-            try:
-                recipes = recipes[:int(recipes_limit)]
-            except ValueError:
-                raise ValidationError({
-                    'errors': (
-                        'recipes_limit - целое положительное число'
-                    )
-                })
-            except AssertionError:
-                raise ValidationError({
-                    'errors': (
-                        'recipes_limit - целое положительное число'
-                    )
-                })
+        recipes = self.context['author_recipes'].get(obj.author_id, [])
         serializer = RecipeShortSerializer(recipes, many=True)
         return serializer.data
 
@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.catalogue import ingredient_catalogue
+from api.utils import invalidate_shopping_cart_cache
+from recipes.models import (
+    CatalogueVersion, Ingredient, Purchase, ShoppingCartExport, Unit
+)
+
+
+@receiver((post_save, post_delete), sender=Purchase)
+def invalidate_purchase_shopping_cart(sender, instance, **kwargs):
+    invalidate_shopping_cart_cache(instance.user_id)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Unit)
+def invalidate_ingredient_catalogue(sender, **kwargs):
+    CatalogueVersion.bump()
+    ingredient_catalogue.clear()
+
+
+@receiver(post_delete, sender=ShoppingCartExport)
+def delete_shopping_cart_export_file(sender, instance, **kwargs):
+    if instance.file:
+        transaction.on_commit(partial(instance.file.delete, save=False))
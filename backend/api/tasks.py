@@ -0,0 +1,73 @@
+import logging
+import os
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image
+
+from api.utils import get_shopping_cart_ingredients, get_shopping_cart_pdf
+from core.images import iter_image_variants
+from recipes.models import Recipe, ShoppingCartExport
+
+logger = logging.getLogger(__name__)
+
+
+def render_shopping_cart_export(export_id):
+    export = ShoppingCartExport.objects.select_related('user').get(
+        id=export_id
+    )
+    export.status = ShoppingCartExport.RUNNING
+    export.save(update_fields=('status',))
+    try:
+        pdf = get_shopping_cart_pdf(
+            export.user, get_shopping_cart_ingredients(export.user)
+        )
+        if pdf is None:
+            raise ValueError('Не удалось сформировать PDF')
+        export.file.save(
+            f'{uuid4().hex}.pdf', ContentFile(pdf), save=False
+        )
+        export.status = ShoppingCartExport.DONE
+    except Exception:
+        logger.exception(
+            'Ошибка формирования списка покупок %s', export_id
+        )
+        export.status = ShoppingCartExport.FAILED
+    export.save(update_fields=('status', 'file'))
+
+
+def process_recipe_image(recipe_id, image_name):
+    storage = Recipe._meta.get_field('image').storage
+    variants = {}
+    try:
+        modified = os.path.getmtime(storage.path(image_name))
+        with storage.open(image_name) as image_file:
+            for variant, extension, content in iter_image_variants(
+                image_file
+            ):
+                variants.setdefault(variant, {})[extension] = storage.save(
+                    f'{settings.RECIPE_IMAGE_VARIANTS_DIR}'
+                    f'{variant}.{extension}',
+                    ContentFile(content)
+                )
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.exception(
+            'Ошибка обработки изображения рецепта %s', recipe_id
+        )
+        return
+    # Пока изображение обрабатывалось, рецепт могли удалить или
+    # загрузить другую картинку: тогда результат больше не нужен.
+    # Ненужные варианты могут использоваться другими рецептами,
+    # их удаляет команда cleanupimages.
+    Recipe.objects.filter(id=recipe_id, image=image_name).update(
+        image=variants['full']['jpeg'],
+        image_variants=variants,
+        updated_at=timezone.now(),
+    )
+    # Исходный файл содержит метаданные EXIF, поэтому удаляется сразу,
+    # если на него не ссылаются другие рецепты. Если его загрузили
+    # заново во время обработки, время изменения не даст его удалить.
+    if not Recipe.objects.filter(image=image_name).exists():
+        storage.delete_unmodified(image_name, modified)
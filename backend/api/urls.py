@@ -4,7 +4,8 @@ from rest_framework.routers import DefaultRouter
 
 from api.views import (
     FavoriteViewSet, IngredientViewSet, PurchaseViewSet,
-    RecipeViewSet, TagViewSet, UserViewSet
+    RecipeViewSet, RequestMetricsViewSet, ShoppingCartExportViewSet,
+    TagViewSet, UserViewSet
 )
 
 user_router = DefaultRouter()
@@ -25,6 +26,11 @@ router.register(
     RecipeViewSet,
     basename='recipes'
 )
+router.register(
+    'recipes/download_shopping_cart/jobs',
+    ShoppingCartExportViewSet,
+    basename='shopping-cart-jobs'
+)
 router.register(
     'ingredients',
     IngredientViewSet,
@@ -40,6 +46,11 @@ router.register(
     PurchaseViewSet,
     basename='purchases'
 )
+router.register(
+    'metrics',
+    RequestMetricsViewSet,
+    basename='metrics'
+)
 
 router.urls.extend([
     url for url in user_router.urls if url.name
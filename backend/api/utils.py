@@ -1,26 +1,172 @@
-from django.shortcuts import get_object_or_404
+import hashlib
+import json
+from collections import defaultdict
 
-from recipes.models import Ingredient, IngredientRecipe, Tag
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import (
+    Count, Exists, F, Max, OuterRef, Subquery, Sum, Window
+)
+from django.db.models.functions import RowNumber
+
+from core.utils import render_to_pdf
+from recipes.models import (
+    CatalogueVersion, Favorite, IngredientRecipe, Purchase,
+    Recipe, Tag
+)
+from users.models import Subscription
+
+SHORT_RECIPE_FIELDS = (
+    'id', 'name', 'image', 'image_variants', 'cooking_time', 'author_id'
+)
 
 
 def collect_ingredientsrecipe_objects(ingredient_data, recipe):
-    buffer = []
-    for data in ingredient_data:
-        ingredient = get_object_or_404(
-            Ingredient,
-            id=data['ingredient']['id']
-        )
-        buffer.append(IngredientRecipe(
+    return [
+        IngredientRecipe(
             recipe=recipe,
-            ingredient=ingredient,
-            amount=data.get('amount')
-        ))
-    return buffer
+            ingredient=data['ingredient'],
+            amount=data['amount']
+        )
+        for data in ingredient_data
+    ]
 
 
-def collect_tags(tag_data):
-    buffer = []
-    for tag_id in tag_data:
-        tag = get_object_or_404(Tag, id=tag_id)
-        buffer.append(tag)
+def collect_author_recipes(author_ids, recipes_limit=None):
+    recipes = Recipe.objects.filter(author_id__in=author_ids)
+    if recipes_limit is None:
+        recipes = recipes.only(*SHORT_RECIPE_FIELDS)
+    else:
+        ranked_recipes = recipes.order_by().annotate(
+            author_position=Window(
+                expression=RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        ).values(*SHORT_RECIPE_FIELDS, 'author_position')
+        sql, params = ranked_recipes.query.sql_with_params()
+        recipes = Recipe.objects.raw(
+            f'SELECT * FROM ({sql}) ranked_recipes '
+            'WHERE ranked_recipes.author_position <= %s '
+            'ORDER BY ranked_recipes.author_position',
+            (*params, recipes_limit)
+        )
+    buffer = defaultdict(list)
+    for recipe in recipes:
+        buffer[recipe.author_id].append(recipe)
     return buffer
+
+
+def get_shopping_cart_ingredients(user):
+    return IngredientRecipe.objects.filter(
+        recipe__purchase__user=user
+    ).values(
+        'ingredient__name', 'ingredient__measurement_unit__name'
+    ).annotate(total=Sum('amount')).order_by('ingredient__name')
+
+
+def get_shopping_cart_cache_key(user, ingredients):
+    content = json.dumps(
+        [user.first_name, ingredients],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str
+    )
+    digest = hashlib.sha256(content.encode()).hexdigest()
+    return f'shopping_cart:{user.id}:{digest}'
+
+
+def get_cached_shopping_cart_pdf(cache_key):
+    return caches[settings.SHOPPING_CART_CACHE].get(cache_key)
+
+
+def cache_shopping_cart_pdf(user, cache_key, pdf):
+    cache = caches[settings.SHOPPING_CART_CACHE]
+    user_key = f'shopping_cart:{user.id}'
+    previous_key = cache.get(user_key)
+    if previous_key and previous_key != cache_key:
+        cache.delete(previous_key)
+    cache.set_many({cache_key: pdf, user_key: cache_key})
+
+
+def invalidate_shopping_cart_cache(user_id):
+    cache = caches[settings.SHOPPING_CART_CACHE]
+    user_key = f'shopping_cart:{user_id}'
+    previous_key = cache.get(user_key)
+    if previous_key:
+        cache.delete_many((previous_key, user_key))
+
+
+def get_shopping_cart_pdf(user, ingredients):
+    ingredients = list(ingredients)
+    cache_key = get_shopping_cart_cache_key(user, ingredients)
+    pdf = get_cached_shopping_cart_pdf(cache_key)
+    if pdf is None:
+        pdf = render_to_pdf(
+            'api/pdf_template.html',
+            {'user': user, 'ingredients': ingredients}
+        )
+        if pdf is not None:
+            cache_shopping_cart_pdf(user, cache_key, pdf)
+    return pdf
+
+
+def get_tags_state(view, request, pk=None, **kwargs):
+    if pk is not None and not pk.isdigit():
+        return None, None
+    tags = Tag.objects.all() if pk is None else Tag.objects.filter(pk=pk)
+    state = tags.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+    if pk is None:
+        # После удаления тега Max(updated_at) не меняется, поэтому
+        # для списка актуальность определяется только по ETag.
+        return tuple(state.values()), None
+    if not state['count']:
+        return None, None
+    return tuple(state.values()), state['updated_at']
+
+
+def get_ingredients_state(view, request, **kwargs):
+    version, updated_at = CatalogueVersion.get_state()
+    return (version, settings.INGREDIENT_AUTOCOMPLETE_LIMIT), updated_at
+
+
+def get_recipe_state(view, request, pk=None, **kwargs):
+    if not pk.isdigit():
+        return None, None
+    user = request.user
+    recipes = Recipe.objects.filter(pk=pk).annotate(
+        tags_updated_at=Subquery(
+            Tag.objects.filter(recipe=OuterRef('pk'))
+            .order_by('-updated_at').values('updated_at')[:1]
+        ),
+        catalogue_version=Subquery(
+            CatalogueVersion.objects.filter(pk=1).values('version')
+        ),
+    )
+    if user.is_authenticated:
+        recipes = recipes.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Purchase.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_subscribed=Exists(Subscription.objects.filter(
+                user=user, author=OuterRef('author')
+            )),
+        )
+    state = recipes.values(
+        'updated_at', 'tags_updated_at', 'catalogue_version',
+        'favorites_count', 'in_carts_count',
+        'author__email', 'author__username',
+        'author__first_name', 'author__last_name',
+        *(
+            ('is_favorited', 'is_in_shopping_cart', 'is_subscribed')
+            if user.is_authenticated else ()
+        )
+    ).first()
+    if state is None:
+        return None, None
+    # Счётчики и отметки пользователя меняются без изменения
+    # updated_at, поэтому актуальность определяется только по ETag.
+    return (user.id, *state.values()), None
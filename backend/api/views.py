@@ -1,28 +1,45 @@
-from django.db import IntegrityError
-from django.db.models import Sum
-from django.http import HttpResponse
+from functools import partial
+from itertools import chain
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Prefetch
+from django.db.models.functions import Greatest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from api.catalogue import ingredient_catalogue
+from api.decorators import conditional_get
 from api.filters import IngredientFilter, RecipeFilter
-from api.paginators import LimitPagination
+from api.paginators import LimitPagination, RecipePagination
 from api.permissions import (
     IsAuthorAdminOrReadOnlyPermission,
     IsNotBannedPermission
 )
+from api.renderers import SHOPPING_CART_RENDERERS
 from api.serializers import (
     FavoriteSerializer, IngredientSerializer,
     PurchaseSerializer, RecipeSerializer,
-    SubscriptionSerializer, TagSerializer
+    ShoppingCartExportSerializer, SubscriptionSerializer,
+    TagSerializer
+)
+from api.tasks import process_recipe_image, render_shopping_cart_export
+from api.utils import (
+    collect_author_recipes, get_ingredients_state, get_recipe_state,
+    get_shopping_cart_ingredients, get_tags_state
 )
-from core.utils import render_to_pdf
+from core.metrics import request_metrics
+from core.tasks import run_in_background
 from recipes.models import (
     Favorite, Ingredient, IngredientRecipe, Purchase,
-    Recipe, Tag
+    Recipe, ShoppingCartExport, Tag
 )
 from users.models import Subscription, User
 
@@ -37,6 +54,44 @@ class UserViewSet(DjoserUserViewSet):
             status=status.HTTP_405_METHOD_NOT_ALLOWED
         )
 
+    def get_subscriptions(self):
+        return Subscription.objects.filter(
+            user=self.request.user
+        ).select_related('author').annotate(
+            recipes_count=Count('author__recipes')
+        ).order_by('id')
+
+    def get_subscription_serializer(self, subscriptions, **kwargs):
+        if kwargs.get('many'):
+            author_ids = [
+                subscription.author_id for subscription in subscriptions
+            ]
+        else:
+            author_ids = [subscriptions.author_id]
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit is not None:
+            try:
+                recipes_limit = int(recipes_limit)
+                if recipes_limit < 0:
+                    raise ValueError
+            except ValueError:
+                raise ValidationError({
+                    'errors': (
+                        'recipes_limit - целое положительное число'
+                    )
+                })
+        return SubscriptionSerializer(
+            subscriptions,
+            context={
+                'request': self.request,
+                # recipes_limit=0 означает, как и раньше, без ограничения.
+                'author_recipes': collect_author_recipes(
+                    author_ids, recipes_limit or None
+                ),
+            },
+            **kwargs
+        )
+
     @action(
         detail=False,
         methods=['get'],
@@ -44,12 +99,9 @@ class UserViewSet(DjoserUserViewSet):
         permission_classes=(IsNotBannedPermission,)
     )
     def subscriptions(self, request):
-        subscriptions = Subscription.objects.filter(user=request.user)
-        self.paginate_queryset(subscriptions)
-        serializer = SubscriptionSerializer(
-            subscriptions,
-            many=True,
-            context={'request': request}
+        subscriptions = self.paginate_queryset(self.get_subscriptions())
+        serializer = self.get_subscription_serializer(
+            subscriptions, many=True
         )
         return self.get_paginated_response(serializer.data)
 
@@ -66,9 +118,8 @@ class UserViewSet(DjoserUserViewSet):
                 subscription = Subscription.objects.create(
                     user=request.user, author=following_user
                 )
-                serializer = SubscriptionSerializer(
-                    subscription,
-                    context={'request': request}
+                serializer = self.get_subscription_serializer(
+                    self.get_subscriptions().get(pk=subscription.pk)
                 )
                 return Response(
                     serializer.data, status=status.HTTP_201_CREATED
@@ -90,23 +141,114 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     pagination_class = None
 
+    @conditional_get(get_tags_state)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get(get_tags_state)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Ingredient.objects.all()
+    queryset = Ingredient.objects.select_related('measurement_unit')
     serializer_class = IngredientSerializer
     pagination_class = None
     filter_backends = (DjangoFilterBackend, )
     filterset_class = IngredientFilter
 
+    @conditional_get(get_ingredients_state)
+    def list(self, request, *args, **kwargs):
+        if not settings.INGREDIENT_CATALOGUE_CACHE:
+            return super().list(request, *args, **kwargs)
+        catalogue = ingredient_catalogue.get()
+        name = request.query_params.get('name')
+        if name:
+            return Response(catalogue.search(
+                name, settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+            ))
+        return Response(catalogue.ingredients)
+
+    @conditional_get(get_ingredients_state)
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.INGREDIENT_CATALOGUE_CACHE:
+            return super().retrieve(request, *args, **kwargs)
+        try:
+            ingredient = ingredient_catalogue.get().get(int(kwargs['pk']))
+        except ValueError:
+            ingredient = None
+        if ingredient is None:
+            raise NotFound
+        return Response(ingredient)
+
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAdminUser,)
+    )
+    def cache_stats(self, request):
+        return Response(ingredient_catalogue.get_stats())
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend, )
     filterset_class = RecipeFilter
-    pagination_class = LimitPagination
+    pagination_class = RecipePagination
     permission_classes = (IsAuthorAdminOrReadOnlyPermission,)
 
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related(
+            'author'
+        ).prefetch_related(
+            Prefetch(
+                'ingredients',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient__measurement_unit'
+                )
+            ),
+            'tags'
+        )
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                Purchase.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
+
+    @conditional_get(get_recipe_state)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def process_image(self, serializer):
+        if 'image' not in serializer.validated_data:
+            return
+        recipe = serializer.instance
+        transaction.on_commit(partial(
+            run_in_background,
+            process_recipe_image, recipe.id, recipe.image.name
+        ))
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.process_image(serializer)
+        serializer.instance = self.get_queryset().get(
+            pk=serializer.instance.pk
+        )
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.process_image(serializer)
+        serializer.instance = self.get_queryset().get(
+            pk=serializer.instance.pk
+        )
+
     def update(self, request, *args, **kwargs):
         if not kwargs.get('partial'):
             return Response(
@@ -118,35 +260,79 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         methods=['get'],
-        permission_classes=(IsNotBannedPermission,)
+        pagination_class=LimitPagination
     )
-    def download_shopping_cart(self, request):
-        ingredients = (
-            IngredientRecipe.objects.filter(
-                recipe__purchase__user=request.user
-            ).values(
-                'ingredient__name', 'ingredient__measurement_unit__name'
-            ).annotate(total=Sum('amount'))
+    def trending(self, request):
+        recipes = self.paginate_queryset(
+            self.get_queryset().filter(trend__isnull=False).order_by(
+                '-trend__score', '-id'
+            )
         )
+        serializer = self.get_serializer(recipes, many=True)
+        return self.get_paginated_response(serializer.data)
 
-        if not ingredients:
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(IsNotBannedPermission,),
+        renderer_classes=SHOPPING_CART_RENDERERS
+    )
+    def download_shopping_cart(self, request):
+        ingredients = get_shopping_cart_ingredients(
+            request.user
+        ).iterator()
+        first_ingredient = next(ingredients, None)
+        if first_ingredient is None:
             return Response(
                 {'details': 'В списке покупок нет ни одного рецепта'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        context = {
-            'user': request.user,
-            'ingredients': ingredients
-        }
-        pdf = render_to_pdf('api/pdf_template.html', context)
-        response = HttpResponse(pdf, content_type='application/pdf')
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        response_class = (
+            StreamingHttpResponse if renderer.streaming else HttpResponse
+        )
+        response = response_class(
+            renderer.stream(
+                chain((first_ingredient,), ingredients), request.user
+            ),
+            content_type=content_type
+        )
         response['Content-Disposition'] = (
-            f'inline; filename="{request.user.username}ShopingCart.pdf"'
+            f'inline; filename="{request.user.username}ShopingCart.'
+            f'{renderer.format}"'
         )
         return response
 
 
+class ShoppingCartExportViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet
+):
+    serializer_class = ShoppingCartExportSerializer
+    permission_classes = (IsAuthenticated,)
+    http_method_names = ['get', 'post']
+
+    def get_queryset(self):
+        return ShoppingCartExport.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        if not get_shopping_cart_ingredients(request.user).exists():
+            return Response(
+                {'details': 'В списке покупок нет ни одного рецепта'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        export = ShoppingCartExport.objects.create(user=request.user)
+        run_in_background(render_shopping_cart_export, export.id)
+        export.refresh_from_db()
+        serializer = self.get_serializer(export)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
 class FavoritePurchaseViewSet(
     mixins.DestroyModelMixin,
     mixins.CreateModelMixin,
@@ -154,12 +340,28 @@ class FavoritePurchaseViewSet(
 ):
     permission_classes = (IsAuthorAdminOrReadOnlyPermission, )
     http_method_names = ['post', 'delete']
+    counter_field = None
 
     def create(self, request, *args, **kwargs):
         request.data['user'] = request.user.id
         request.data['recipe'] = kwargs.get('recipe_id')
         return super().create(request, *args, **kwargs)
 
+    def update_recipe_counter(self, recipe_id, delta):
+        Recipe.objects.filter(pk=recipe_id).update(**{
+            self.counter_field: Greatest(F(self.counter_field) + delta, 0)
+        })
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        self.update_recipe_counter(instance.recipe_id, 1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        self.update_recipe_counter(instance.recipe_id, -1)
+
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
 
@@ -167,6 +369,7 @@ class FavoritePurchaseViewSet(
 class FavoriteViewSet(mixins.ListModelMixin, FavoritePurchaseViewSet):
     queryset = Favorite.objects.all()
     serializer_class = FavoriteSerializer
+    counter_field = 'favorites_count'
 
     def get_object(self):
         return get_object_or_404(
@@ -179,6 +382,7 @@ class FavoriteViewSet(mixins.ListModelMixin, FavoritePurchaseViewSet):
 class PurchaseViewSet(FavoritePurchaseViewSet):
     queryset = Purchase.objects.all()
     serializer_class = PurchaseSerializer
+    counter_field = 'in_carts_count'
 
     def get_object(self):
         return get_object_or_404(
@@ -186,3 +390,10 @@ class PurchaseViewSet(FavoritePurchaseViewSet):
             recipe=self.kwargs.get('recipe_id'),
             user=self.request.user.id
         )
+
+
+class RequestMetricsViewSet(viewsets.ViewSet):
+    permission_classes = (IsAdminUser,)
+
+    def list(self, request):
+        return Response(request_metrics.get_stats())
@@ -0,0 +1,130 @@
+import os
+import platform
+import statistics
+import time
+
+import django
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.utils import percentile, print_results, save_results
+from recipes.models import Recipe, Tag
+from users.models import User
+
+SEED_OPTIONS = {
+    'users': int(os.getenv('BENCHMARK_USERS', 2000)),
+    'recipes': int(os.getenv('BENCHMARK_RECIPES', 20000)),
+    'favorites': int(os.getenv('BENCHMARK_FAVORITES', 100000)),
+    'purchases': int(os.getenv('BENCHMARK_PURCHASES', 20000)),
+    'subscriptions': int(os.getenv('BENCHMARK_SUBSCRIPTIONS', 20000)),
+    'seed': 0,
+}
+REQUESTS_AMOUNT = int(os.getenv('BENCHMARK_REQUESTS', 50))
+RESULTS_PATH = os.getenv('BENCHMARK_RESULTS_PATH', 'benchmark_results.json')
+
+
+def get_endpoints(recipe, author, tags):
+    recipes_url = reverse('recipes-list')
+    tags_query = '&'.join(f'tags={tag.slug}' for tag in tags)
+    return (
+        ('recipes feed', f'{recipes_url}?{tags_query}'),
+        ('recipes feed, cursor', f'{recipes_url}?{tags_query}&cursor='),
+        (
+            'recipes by author',
+            f'{recipes_url}?{tags_query}&author={author.id}&cursor='
+        ),
+        ('favorites', f'{recipes_url}?{tags_query}&is_favorited=1'),
+        ('shopping cart', f'{recipes_url}?is_in_shopping_cart=1'),
+        ('recipe', reverse('recipes-detail', args=(recipe.id,))),
+        ('trending', reverse('recipes-trending')),
+        ('subscriptions', reverse('users-subscriptions') + '?recipes_limit=3'),
+        (
+            'download shopping cart',
+            reverse('recipes-download-shopping-cart') + '?format=csv'
+        ),
+        ('tags', reverse('tags-list')),
+        ('ingredients search', reverse('ingredients-list') + '?name=Ингр'),
+    )
+
+
+def request(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code == 200, url
+    return len(context.captured_queries)
+
+
+def measure_endpoint(client, url):
+    request(client, url)
+    timings = []
+    queries = []
+    started = time.perf_counter()
+    for _ in range(REQUESTS_AMOUNT):
+        request_started = time.perf_counter()
+        queries.append(request(client, url))
+        timings.append((time.perf_counter() - request_started) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'requests': REQUESTS_AMOUNT,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'throughput_rps': round(REQUESTS_AMOUNT / elapsed, 1),
+        'queries': max(queries),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_api_load():
+    '''Время ответа, пропускная способность и количество запросов к БД
+    основных эндпоинтов на синтетических данных seedbench'''
+    call_command('seedbench', **SEED_OPTIONS)
+    call_command('refreshtrending')
+    # Самый активный пользователь: у него самые длинные списки
+    # избранного, покупок и подписок.
+    user = User.objects.annotate(
+        favorites_count=Count('favorite', distinct=True)
+    ).order_by('-favorites_count').first()
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+    )
+    author = User.objects.annotate(
+        recipes_count=Count('recipes')
+    ).order_by('-recipes_count').first()
+    recipe = Recipe.objects.order_by('-favorites_count').first()
+
+    results = {
+        name: measure_endpoint(client, url)
+        for name, url in get_endpoints(recipe, author, Tag.objects.all())
+    }
+    print_results(
+        f'Нагрузка на API: {connection.vendor}, '
+        f'{REQUESTS_AMOUNT} запросов на эндпоинт',
+        ('endpoint', 'p50, ms', 'p99, ms', 'req/s', 'queries'),
+        [
+            (
+                name[:14], result['p50_ms'], result['p99_ms'],
+                result['throughput_rps'], result['queries']
+            )
+            for name, result in results.items()
+        ]
+    )
+    save_results(RESULTS_PATH, timezone.now().isoformat(), {
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'dataset': SEED_OPTIONS,
+        'endpoints': results,
+    })
@@ -0,0 +1,120 @@
+import os
+import time
+from io import BytesIO
+from threading import Lock, Thread
+
+import pytest
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+
+from benchmarks.utils import print_results
+from core.db.postgresql.base import DatabaseWrapper
+from recipes.models import Tag
+
+THREADS_AMOUNT = int(os.getenv('BENCHMARK_THREADS', 4))
+REQUESTS_AMOUNT = int(os.getenv('BENCHMARK_REQUESTS', 500))
+MODES = (
+    ('no reuse', {'CONN_MAX_AGE': 0, 'OPTIONS': {}}),
+    (
+        'reuse',
+        {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}}
+    ),
+    (
+        'reuse + check',
+        {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': {}}
+    ),
+    ('pool', {
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': {
+            'min_size': THREADS_AMOUNT, 'max_size': THREADS_AMOUNT
+        }},
+    }),
+)
+
+
+def run_worker(application, path, requests_amount):
+    '''Обрабатывает запросы как поток воркера gunicorn: WSGIHandler
+    отправляет сигналы начала и конца запроса, по которым Django
+    закрывает или переиспользует соединения с БД'''
+    def start_response(status, headers):
+        assert status.startswith('200'), status
+
+    try:
+        for _ in range(requests_amount):
+            response = application({
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': 'testserver',
+                'SERVER_PORT': '80',
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(),
+            }, start_response)
+            b''.join(response)
+            response.close()
+    finally:
+        connections.close_all()
+
+
+def measure_mode(application, path, database_settings):
+    settings_dict = connections.databases['default']
+    original_settings = settings_dict.copy()
+    settings_dict.update(database_settings)
+    created = []
+    lock = Lock()
+
+    def count_connection(sender, connection, **kwargs):
+        with lock:
+            created.append(connection.alias)
+
+    connection_created.connect(count_connection)
+    threads = [
+        Thread(target=run_worker, args=(application, path, REQUESTS_AMOUNT))
+        for _ in range(THREADS_AMOUNT)
+    ]
+    try:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        connection_created.disconnect(count_connection)
+        settings_dict.clear()
+        settings_dict.update(original_settings)
+        DatabaseWrapper.close_pools()
+    return THREADS_AMOUNT * REQUESTS_AMOUNT / elapsed, len(created)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connection_reuse():
+    '''Пропускная способность /api/tags/ без переиспользования
+    соединений с PostgreSQL, с постоянными соединениями (с проверкой
+    и без) и с пулом соединений'''
+    if connection.vendor != 'postgresql':
+        pytest.skip('Бенчмарк соединений с PostgreSQL')
+    Tag.objects.bulk_create(
+        Tag(name=f'BenchTag{index}', slug=f'bench-tag-{index}',
+            color=f'#0000{index:02d}')
+        for index in range(20)
+    )
+    application = WSGIHandler()
+    path = reverse('tags-list')
+    results = {
+        name: measure_mode(application, path, database_settings)
+        for name, database_settings in MODES
+    }
+    baseline = results['no reuse'][0]
+    print_results(
+        f'Соединения с БД: {THREADS_AMOUNT} потоков по '
+        f'{REQUESTS_AMOUNT} запросов к {path}',
+        ('mode', 'req/s', 'vs no reuse', 'connections'),
+        [
+            (name, f'{rps:.0f}', f'{rps / baseline:.2f}x', created)
+            for name, (rps, created) in results.items()
+        ]
+    )
@@ -0,0 +1,85 @@
+import json
+import random
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+
+from api.catalogue import ingredient_catalogue
+from benchmarks.utils import measure_latencies, percentile, print_results
+from recipes.models import Ingredient, Unit
+
+CATALOGUE_SIZE = 100000
+QUERIES_AMOUNT = 1000
+P99_TARGET_MS = 5
+
+
+def generate_queries(names):
+    random.seed(0)
+    queries = []
+    for _ in range(QUERIES_AMOUNT // 2):
+        name = random.choice(names)
+        queries.append(name[:random.randint(1, 6)])
+        start = random.randint(0, max(len(name) - 3, 0))
+        queries.append(name[start:start + 3])
+    return queries
+
+
+def fill_catalogue():
+    with open(settings.JSON_PATH, encoding='utf-8') as json_file:
+        names = [row['name'] for row in json.load(json_file)]
+    unit = Unit.objects.create(name='г')
+    Ingredient.objects.bulk_create(
+        (
+            Ingredient(
+                name=f'{names[index % len(names)]} {index}',
+                measurement_unit=unit
+            )
+            for index in range(CATALOGUE_SIZE)
+        ),
+        batch_size=5000,
+    )
+    return names
+
+
+def legacy_search(query):
+    list(
+        Ingredient.objects.filter(name__icontains=query)
+        .values_list('id', flat=True)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingredient_search(client):
+    '''Сравнение поиска ингредиентов по вхождению в БД с индексом в памяти
+    процесса на каталоге из 100 тысяч ингредиентов'''
+    queries = generate_queries(fill_catalogue())
+    limit = settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+    index = ingredient_catalogue.get().index
+    url = reverse('ingredients-list')
+
+    results = {
+        'icontains': measure_latencies(
+            legacy_search, [(query,) for query in queries[:100]]
+        ),
+        'prefix index': measure_latencies(
+            index.search, [(query, limit) for query in queries]
+        ),
+        'api, catalogue cache': measure_latencies(
+            lambda query: client.get(url, {'name': query}),
+            [(query,) for query in queries[:200]]
+        ),
+    }
+    print_results(
+        f'Поиск ингредиентов, каталог из {CATALOGUE_SIZE} записей',
+        ('mode', 'p50, ms', 'p99, ms'),
+        [
+            (
+                mode,
+                f'{percentile(timings, 50):.2f}',
+                f'{percentile(timings, 99):.2f}',
+            )
+            for mode, timings in results.items()
+        ]
+    )
+    assert percentile(results['prefix index'], 99) < P99_TARGET_MS
@@ -0,0 +1,63 @@
+import time
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image
+
+from benchmarks.utils import print_results
+from core.images import iter_image_variants
+
+PHOTO_SIZE = (4032, 3024)
+FEED_PAGE_SIZE = 6
+
+
+def make_photo():
+    '''Снимок с шумом, который сжимается так же плохо, как фотография
+    с телефона'''
+    noise = [
+        Image.effect_noise(PHOTO_SIZE, sigma).convert('L')
+        for sigma in (60, 70, 80)
+    ]
+    photo = Image.merge('RGB', noise)
+    buffer = BytesIO()
+    photo.save(buffer, 'JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def test_recipe_images():
+    '''Размер вариантов картинки рецепта и время их создания для
+    фотографии 12 Мп'''
+    photo = make_photo()
+    started = time.perf_counter()
+    variants = {
+        (variant, extension): len(content)
+        for variant, extension, content in iter_image_variants(
+            BytesIO(photo)
+        )
+    }
+    elapsed = (time.perf_counter() - started) * 1000
+    rows = [('original', 'jpeg', f'{len(photo) / 1024:.0f}', '1.0')]
+    for (variant, extension), size in variants.items():
+        rows.append((
+            variant, extension, f'{size / 1024:.0f}',
+            f'{len(photo) / size:.1f}'
+        ))
+    print_results(
+        f'Варианты картинки {PHOTO_SIZE[0]}x{PHOTO_SIZE[1]}: '
+        f'{elapsed:.0f} мс на все варианты',
+        ('variant', 'format', 'size, KiB', 'smaller, x'),
+        rows
+    )
+    card_size = variants[('card', 'webp')]
+    print_results(
+        f'Картинки ленты из {FEED_PAGE_SIZE} рецептов',
+        ('images', 'size, KiB'),
+        (
+            ('original', f'{FEED_PAGE_SIZE * len(photo) / 1024:.0f}'),
+            ('card webp', f'{FEED_PAGE_SIZE * card_size / 1024:.0f}'),
+        )
+    )
+    assert len(photo) / card_size >= 10
+    assert set(variant for variant, _ in variants) == set(
+        settings.RECIPE_IMAGE_VARIANTS
+    )
@@ -0,0 +1,93 @@
+import os
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.paginators import RecipePagination
+from benchmarks.utils import measure, print_results
+from recipes.models import Recipe
+
+RECIPES_AMOUNT = int(os.getenv('BENCHMARK_RECIPES_AMOUNT', 1000000))
+PAGE_SIZE = 100
+DEEP_PAGE_FRACTION = 0.5
+INSERT_BATCH_SIZE = 50000
+
+
+def fill_recipes(author):
+    table = Recipe._meta.db_table
+    columns = (
+        'author_id', 'name', 'image', 'image_variants', 'text',
+        'cooking_time', 'pub_date', 'updated_at', 'favorites_count',
+        'in_carts_count'
+    )
+    sql = (
+        f'INSERT INTO {table} ({", ".join(columns)}) '
+        f'VALUES ({", ".join(["%s"] * len(columns))})'
+    )
+    started = timezone.now()
+    with connection.cursor() as cursor:
+        for batch_start in range(0, RECIPES_AMOUNT, INSERT_BATCH_SIZE):
+            rows = []
+            for index in range(
+                batch_start,
+                min(batch_start + INSERT_BATCH_SIZE, RECIPES_AMOUNT)
+            ):
+                pub_date = connection.ops.adapt_datetimefield_value(
+                    started - timedelta(seconds=index // 2)
+                )
+                rows.append((
+                    author.id, f'Рецепт {index}', 'recipe/images/temp.png',
+                    '{}', 'Описание', 10, pub_date, pub_date, 0, 0
+                ))
+            cursor.executemany(sql, rows)
+
+
+def paginate(query_params):
+    request = Request(APIRequestFactory().get('/api/recipes/', query_params))
+    paginator = RecipePagination()
+    page = paginator.paginate_queryset(Recipe.objects.all(), request)
+    assert page, f'Страница ленты {query_params} пуста'
+    return paginator
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recipe_pagination(user):
+    '''Сравнение первой и глубокой страницы ленты рецептов при пагинации
+    по номеру страницы и по курсору'''
+    assert RECIPES_AMOUNT > PAGE_SIZE, (
+        'Для глубокой страницы нужно больше одной страницы рецептов'
+    )
+    deep_page = max(2, int(RECIPES_AMOUNT / PAGE_SIZE * DEEP_PAGE_FRACTION))
+    fill_recipes(user)
+    deep_recipe = Recipe.objects.order_by('-pub_date', '-id')[
+        (deep_page - 1) * PAGE_SIZE - 1
+    ]
+    deep_link = paginate(
+        {'cursor': '', 'limit': PAGE_SIZE}
+    ).keyset_paginator.encode_cursor(deep_recipe, False)
+    deep_cursor = parse_qs(urlparse(deep_link).query)['cursor'][0]
+
+    cases = (
+        ('page number', 1, {'page': 1, 'limit': PAGE_SIZE}),
+        ('page number', deep_page, {'page': deep_page, 'limit': PAGE_SIZE}),
+        ('cursor', 1, {'cursor': '', 'limit': PAGE_SIZE}),
+        ('cursor', deep_page, {'cursor': deep_cursor, 'limit': PAGE_SIZE}),
+        (
+            'cursor, count=exact', deep_page,
+            {'cursor': deep_cursor, 'limit': PAGE_SIZE, 'count': 'exact'}
+        ),
+    )
+    rows = []
+    for mode, page, query_params in cases:
+        latency, _ = measure(lambda: paginate(query_params))
+        rows.append((mode, page, f'{latency:.2f}'))
+    print_results(
+        f'Лента рецептов: {RECIPES_AMOUNT} рецептов, {PAGE_SIZE} на странице',
+        ('pagination', 'page', 'latency, ms'),
+        rows
+    )
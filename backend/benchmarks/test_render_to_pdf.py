@@ -0,0 +1,86 @@
+import os
+from functools import partial
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.template.loader import get_template
+from xhtml2pdf import pisa
+
+from benchmarks.utils import measure, print_results
+from core.utils import render_to_pdf
+
+ROWS_AMOUNTS = (10, 100)
+
+
+def write_legacy_stylesheet(directory):
+    '''Стили в том виде, в котором они были до появления кэша ресурсов:
+    фон - исходный JPEG'''
+    with open(os.path.join(settings.STATIC_ROOT, 'css', 'style.css')) as file:
+        css = file.read()
+    css = css.replace(
+        '/static/img/background.jpg',
+        os.path.join(settings.STATIC_ROOT, 'img', 'background.jpg')
+    )
+    path = os.path.join(directory, 'style.css')
+    with open(path, 'w') as file:
+        file.write(css)
+    return path
+
+
+def legacy_render_to_pdf(template_src, context_dict, stylesheet):
+    def fetch_pdf_resources(uri, rel):
+        if uri.endswith('css/style.css'):
+            return stylesheet
+        if os.path.isfile(uri):
+            return uri
+        if uri.find(settings.STATIC_URL) != -1:
+            return os.path.join(
+                settings.STATIC_ROOT, uri.replace(settings.STATIC_URL, '')
+            )
+        return uri
+
+    html = get_template(template_src).render(context_dict)
+    result = BytesIO()
+    pisa.pisaDocument(
+        BytesIO(html.encode('UTF-8')), result,
+        encoding='UTF-8',
+        link_callback=fetch_pdf_resources,
+    )
+    return result.getvalue()
+
+
+def test_render_to_pdf(tmp_path):
+    '''Сравнение времени формирования PDF до и после кэширования
+    стилей, шрифтов и изображений и отрисовки фона на холсте'''
+    stylesheet = write_legacy_stylesheet(tmp_path)
+    rows = []
+    for rows_amount in ROWS_AMOUNTS:
+        context = {
+            'user': SimpleNamespace(first_name='Пользователь'),
+            'ingredients': [
+                {
+                    'ingredient__name': f'Ингредиент {index}',
+                    'ingredient__measurement_unit__name': 'г',
+                    'total': index,
+                }
+                for index in range(rows_amount)
+            ],
+        }
+        for name, render in (
+            ('legacy', partial(legacy_render_to_pdf, stylesheet=stylesheet)),
+            ('cached', render_to_pdf),
+        ):
+            size = len(render('api/pdf_template.html', context))
+            latency, peak_memory = measure(
+                lambda: render('api/pdf_template.html', context)
+            )
+            rows.append((
+                rows_amount, name, f'{latency:.1f}',
+                f'{peak_memory:.0f}', size
+            ))
+    print_results(
+        'Формирование PDF со списком покупок',
+        ('rows', 'pipeline', 'latency, ms', 'peak, KiB', 'bytes'),
+        rows
+    )
@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.utils import measure_latencies, percentile, print_results
+from recipes.models import Tag
+from users.models import User
+
+REQUESTS_AMOUNT = 300
+
+
+def get_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.get_or_create(user=user)[0]}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+def test_request_metrics(settings, monkeypatch):
+    '''Накладные расходы QueryMetricsMiddleware на ленту рецептов:
+    запросы с выключенными и включёнными метриками чередуются, чтобы
+    дрейф производительности машины не искажал сравнение'''
+    call_command(
+        'seedbench', users=200, recipes=2000, favorites=5000,
+        purchases=1000, subscriptions=1000, seed=0
+    )
+    monkeypatch.setattr(
+        logging.getLogger('core.middleware'), 'handlers',
+        [logging.NullHandler()]
+    )
+    user = User.objects.first()
+    url = reverse('recipes-list') + '?' + '&'.join(
+        f'tags={tag.slug}' for tag in Tag.objects.all()
+    )
+    clients = {}
+    for enabled in (False, True):
+        settings.REQUEST_METRICS_ENABLED = enabled
+        clients[enabled] = get_client(user)
+        clients[enabled].get(url)
+    latencies = {False: [], True: []}
+    for _ in range(REQUESTS_AMOUNT):
+        for enabled, client in clients.items():
+            latencies[enabled].extend(
+                measure_latencies(lambda: client.get(url), [()])
+            )
+    baseline = percentile(latencies[False], 50)
+    print_results(
+        f'QueryMetricsMiddleware: {REQUESTS_AMOUNT} запросов к ленте',
+        ('metrics', 'p50, ms', 'p99, ms', 'vs off'),
+        [
+            (
+                'on' if enabled else 'off',
+                f'{percentile(timings, 50):.2f}',
+                f'{percentile(timings, 99):.2f}',
+                f'{(percentile(timings, 50) / baseline - 1) * 100:+.1f}%'
+            )
+            for enabled, timings in latencies.items()
+        ]
+    )
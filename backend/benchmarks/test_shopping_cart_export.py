@@ -0,0 +1,87 @@
+import pytest
+from django.urls import reverse
+
+from api.utils import invalidate_shopping_cart_cache
+from benchmarks.utils import measure, print_results
+from recipes.models import (
+    Ingredient, IngredientRecipe, Purchase, Recipe, Unit
+)
+
+CART_SIZES = (10, 100, 1000)
+FORMATS = ('pdf', 'csv', 'txt', 'json')
+INGREDIENTS_PER_RECIPE = 5
+
+
+def fill_shopping_cart(user, cart_size):
+    unit = Unit.objects.create(name='г')
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'Ингредиент {index}', measurement_unit=unit)
+        for index in range(cart_size)
+    )
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=user,
+            name=f'Рецепт {index}',
+            text='Описание',
+            cooking_time=10,
+            image='recipe/images/temp.png',
+        )
+        for index in range(cart_size)
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_ids[
+                (index + offset) % len(ingredient_ids)
+            ],
+            amount=offset + 1,
+        )
+        for index, recipe_id in enumerate(recipe_ids)
+        for offset in range(INGREDIENTS_PER_RECIPE)
+    )
+    Purchase.objects.bulk_create(
+        Purchase(user=user, recipe_id=recipe_id) for recipe_id in recipe_ids
+    )
+
+
+def download(client, url, user=None):
+    if user is not None:
+        invalidate_shopping_cart_cache(user.id)
+    response = client.get(url)
+    assert response.status_code == 200
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('cart_size', CART_SIZES)
+def test_shopping_cart_export(user_client, user, cart_size):
+    '''Сравнение времени ответа и пикового потребления памяти
+    при выгрузке списка покупок в разных форматах. PDF измеряется
+    с очисткой кэша перед каждым запросом и отдельно из кэша'''
+    fill_shopping_cart(user, cart_size)
+    download_url = reverse('recipes-download-shopping-cart')
+    cases = [
+        (format, format, user if format == 'pdf' else None)
+        for format in FORMATS
+    ]
+    cases.append(('pdf, cached', 'pdf', None))
+    rows = []
+    for name, format, cache_user in cases:
+        url = download_url + f'?format={format}'
+        size = len(download(user_client, url))
+        latency, peak_memory = measure(
+            lambda: download(user_client, url, cache_user),
+            repeat=1 if name == 'pdf' and cart_size > 100 else 5
+        )
+        rows.append((
+            name, f'{latency:.1f}', f'{peak_memory:.0f}', size
+        ))
+    print_results(
+        f'Список покупок из {cart_size} рецептов',
+        ('format', 'latency, ms', 'peak, KiB', 'bytes'),
+        rows
+    )
@@ -0,0 +1,55 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+
+def measure(func, repeat=5):
+    '''Возвращает медианное время выполнения func в миллисекундах
+    и пиковое потребление памяти в килобайтах'''
+    timings = []
+    peaks = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return statistics.median(timings), max(peaks)
+
+
+def print_results(title, columns, rows):
+    print(f'\n{title}')
+    print(' | '.join(f'{column:>14}' for column in columns))
+    for row in rows:
+        print(' | '.join(f'{value:>14}' for value in row))
+
+
+def measure_latencies(func, arguments):
+    '''Возвращает время выполнения func в миллисекундах для каждого
+    набора аргументов'''
+    timings = []
+    for args in arguments:
+        started = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def save_results(path, name, results):
+    '''Дописывает результаты бенчмарка в JSON-файл под ключом name,
+    чтобы результаты разных прогонов можно было сравнить'''
+    try:
+        with open(path, encoding='utf-8') as results_file:
+            saved_results = json.load(results_file)
+    except FileNotFoundError:
+        saved_results = {}
+    saved_results[name] = results
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump(saved_results, results_file, ensure_ascii=False, indent=2)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from core.utils import batched
+from recipes.models import Favorite, Purchase, Recipe
+
+
+def count_recipe_relations(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(recipe=OuterRef('pk'))
+            .order_by().values('recipe')
+            .annotate(count=Count('id')).values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def reconcile_recipe_counters(batch_size=settings.IMPORT_BATCH_SIZE):
+    drifted_ids = Recipe.objects.annotate(
+        actual_favorites_count=count_recipe_relations(Favorite),
+        actual_in_carts_count=count_recipe_relations(Purchase),
+    ).filter(
+        ~Q(favorites_count=F('actual_favorites_count'))
+        | ~Q(in_carts_count=F('actual_in_carts_count'))
+    ).values_list('id', flat=True).iterator()
+    fixed_count = 0
+    for batch in batched(drifted_ids, batch_size):
+        fixed_count += Recipe.objects.filter(id__in=batch).update(
+            favorites_count=count_recipe_relations(Favorite),
+            in_carts_count=count_recipe_relations(Purchase),
+        )
+    return fixed_count
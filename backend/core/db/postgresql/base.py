@@ -0,0 +1,162 @@
+import json
+from threading import BoundedSemaphore, Lock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from psycopg2.extras import register_default_jsonb
+from psycopg2.pool import ThreadedConnectionPool
+
+Database = base.Database
+
+
+def is_connection_usable(connection):
+    try:
+        # Соединение из пула не в транзакции: пул откатывает её при
+        # возврате.
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Database.Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+    '''Пул соединений psycopg2, общий для потоков процесса. Если все
+    соединения заняты, ждёт освобождения не дольше timeout секунд.
+
+    Открытыми между запросами остаются не больше min_size соединений.
+    '''
+
+    def __init__(self, connection_params, min_size=2, max_size=10,
+                 timeout=30):
+        self.pool = ThreadedConnectionPool(
+            min_size, max_size, **connection_params
+        )
+        self.slots = BoundedSemaphore(max_size)
+        self.timeout = timeout
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise Database.OperationalError(
+                f'Нет свободного соединения в пуле за {self.timeout} с'
+            )
+        try:
+            return self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        try:
+            self.pool.putconn(connection, close=close)
+        finally:
+            self.slots.release()
+
+    def close(self):
+        self.pool.closeall()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    '''PostgreSQL с проверкой постоянного соединения перед первым
+    использованием в запросе (CONN_HEALTH_CHECKS, как в Django 4.1) и
+    необязательным пулом соединений для потоковых воркеров
+    (OPTIONS['pool'] с параметрами ConnectionPool).
+
+    Соединение из пула возвращается в него в конце каждого запроса,
+    поэтому пул нельзя сочетать с CONN_MAX_AGE больше 0.
+    '''
+    pools = {}
+    pools_lock = Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_options = self.settings_dict['OPTIONS'].get('pool')
+        if self.pool_options is True:
+            self.pool_options = {}
+        if self.pool_options and self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured(
+                'Пул соединений требует CONN_MAX_AGE = 0'
+            )
+        self.pool = None
+        self.health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    @classmethod
+    def close_pools(cls):
+        with cls.pools_lock:
+            for pool in cls.pools.values():
+                pool.close()
+            cls.pools = {}
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_pool(self, conn_params):
+        key = json.dumps(conn_params, sort_keys=True, default=str)
+        with self.pools_lock:
+            if key not in self.pools:
+                self.pools[key] = ConnectionPool(
+                    conn_params, **self.pool_options
+                )
+            return self.pools[key]
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_options:
+            return super().get_new_connection(conn_params)
+        self.pool = self.get_pool(conn_params)
+        connection = self.pool.getconn()
+        while self.health_check_enabled and not is_connection_usable(
+            connection
+        ):
+            self.pool.putconn(connection, close=True)
+            connection = self.pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # После перехваченной приложением ошибки соединение обычно
+            # исправно: в пул не возвращаются только не прошедшие проверку.
+            self.pool.putconn(self.connection, close=(
+                self.errors_occurred
+                and not is_connection_usable(self.connection)
+            ))
+
+    def close_if_unusable_or_obsolete(self):
+        # Вызывается в начале и в конце каждого запроса: следующее
+        # использование соединения начнётся с проверки.
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None
+            or not self.health_check_enabled
+            or self.health_check_done
+        ):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,38 @@
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+def prepare_image(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def iter_image_variants(image_file):
+    with Image.open(image_file) as image:
+        if image.width * image.height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            raise ValueError('Изображение слишком большое')
+        # JPEG декодируется сразу в уменьшенном в 2-8 раз масштабе, если
+        # он не меньше самого крупного варианта, что ограничивает память.
+        image.draft('RGB', max(
+            settings.RECIPE_IMAGE_VARIANTS.values(),
+            key=lambda size: size[0] * size[1]
+        ))
+        # Метаданные EXIF не переносятся в варианты: ориентация
+        # применяется к пикселям, остальное отбрасывается.
+        image = prepare_image(image)
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        for extension, (image_format, options) in (
+            settings.RECIPE_IMAGE_FORMATS.items()
+        ):
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            yield variant, extension, buffer.getvalue()
@@ -0,0 +1,158 @@
+import json
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+from core.utils import batched
+from recipes.models import CatalogueVersion, Ingredient, Unit
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Длина самого длинного неделимого фрагмента JSON: escape \uXXXX.
+JSON_MAX_TOKEN_SIZE = 6
+
+
+def is_json_truncated(error):
+    '''Ошибка разбора может исчезнуть после дочитывания файла:
+    строка или лексема обрывается на конце буфера.'''
+    return (
+        error.msg.startswith('Unterminated string')
+        or len(error.doc) - error.pos <= JSON_MAX_TOKEN_SIZE
+    )
+
+
+def iter_json_records(
+    json_file,
+    chunk_size=settings.IMPORT_JSON_CHUNK_SIZE
+):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    # Символы и строки файла до начала буфера, для сообщений об ошибках.
+    offset = 0
+    lines = 0
+    is_array = None
+    is_closed = False
+    expect_record = True
+    has_records = False
+    while True:
+        position = JSON_WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            chunk = json_file.read(chunk_size)
+            if not chunk:
+                break
+            offset += len(buffer)
+            lines += buffer.count('\n')
+            buffer, position = chunk, 0
+            continue
+        char = buffer[position]
+        if is_closed:
+            raise ValueError('Лишние данные после JSON-массива')
+        if is_array is None:
+            is_array = char == '['
+            if is_array:
+                position += 1
+            continue
+        if is_array and char == ']' and (
+            not expect_record or not has_records
+        ):
+            is_closed = True
+            position += 1
+            continue
+        if is_array and char == ',' and not expect_record:
+            expect_record = True
+            position += 1
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            record, end, decode_error = None, None, error
+        else:
+            decode_error = None
+        if end == len(buffer) or (
+            decode_error is not None and is_json_truncated(decode_error)
+        ):
+            # Значение может продолжаться в следующем фрагменте файла.
+            if len(buffer) - position > settings.IMPORT_JSON_MAX_RECORD_SIZE:
+                raise ValueError('Слишком большая запись в JSON')
+            chunk = json_file.read(chunk_size)
+            if chunk:
+                offset += position
+                lines += buffer.count('\n', 0, position)
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+        if decode_error is not None:
+            raise ValueError(
+                f'Некорректный JSON в строке '
+                f'{lines + decode_error.lineno}, символ '
+                f'{offset + decode_error.pos + 1}: {decode_error.msg}'
+            ) from decode_error
+        if is_array and not expect_record:
+            raise ValueError('Ожидается запятая между элементами массива')
+        expect_record = not is_array
+        has_records = True
+        position = end
+        yield record
+    if is_array and not is_closed:
+        raise ValueError('JSON-массив не завершён')
+
+
+def validate_ingredient_row(row, row_number):
+    if not isinstance(row, dict):
+        raise ValueError(f'Строка {row_number}: ожидается объект')
+    for field, max_length in (
+        ('name', settings.MAX_LENGTH_INGREDIENT_NAME),
+        ('measurement_unit', settings.MAX_LENGTH_UNIT_NAME),
+    ):
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(
+                f'Строка {row_number}: не заполнено поле {field}'
+            )
+        if len(value) > max_length:
+            raise ValueError(
+                f'Строка {row_number}: поле {field} длиннее '
+                f'{max_length} символов'
+            )
+
+
+def resolve_units(unit_ids, unit_names):
+    missing_names = set(unit_names) - unit_ids.keys()
+    if missing_names:
+        Unit.objects.bulk_create(Unit(name=name) for name in missing_names)
+        unit_ids.update(
+            Unit.objects.filter(name__in=missing_names)
+            .values_list('name', 'id')
+        )
+
+
+def load_ingredients_data(
+    ingredient_data,
+    batch_size=settings.IMPORT_BATCH_SIZE,
+    dry_run=False
+):
+    rows_count = 0
+    with transaction.atomic():
+        unit_ids = (
+            {} if dry_run else dict(Unit.objects.values_list('name', 'id'))
+        )
+        for batch in batched(ingredient_data, batch_size):
+            for row_number, row in enumerate(batch, rows_count + 1):
+                validate_ingredient_row(row, row_number)
+            rows_count += len(batch)
+            if dry_run:
+                continue
+            resolve_units(unit_ids, (row['measurement_unit'] for row in batch))
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(
+                        name=row['name'],
+                        measurement_unit_id=unit_ids[row['measurement_unit']]
+                    )
+                    for row in batch
+                ),
+                ignore_conflicts=True,
+            )
+        if not dry_run:
+            CatalogueVersion.bump()
+    return rows_count
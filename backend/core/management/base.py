@@ -0,0 +1,59 @@
+import time
+from abc import ABCMeta, abstractmethod
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importing import load_ingredients_data
+
+
+class ImportIngredientsCommand(BaseCommand, metaclass=ABCMeta):
+    default_path = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=self.default_path,
+            help='Путь к файлу с ингредиентами',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.IMPORT_BATCH_SIZE,
+            help='Количество ингредиентов в одном INSERT',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Проверить файл без сохранения в базу данных',
+        )
+
+    @abstractmethod
+    def read_data(self, path):
+        '''Возвращает итератор словарей с полями name
+        и measurement_unit.'''
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        started = time.perf_counter()
+        try:
+            rows_count = load_ingredients_data(
+                self.read_data(options['path']),
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+
+        message = (
+            settings.DRY_RUN_IMPORT_MESSAGE if options['dry_run']
+            else settings.SUCCES_IMPORT_MESSAGE
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{message}: {rows_count} строк за {elapsed:.2f} с '
+                f'({rows_count / elapsed:.0f} строк/с)'
+            )
+        )
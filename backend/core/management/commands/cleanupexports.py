@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import ShoppingCartExport
+
+
+class Command(BaseCommand):
+    help = settings.HELP_CLEANUP_EXPORTS_MESSAGE
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        failed_count = ShoppingCartExport.objects.filter(
+            status__in=(
+                ShoppingCartExport.PENDING, ShoppingCartExport.RUNNING
+            ),
+            created__lt=now - settings.SHOPPING_CART_EXPORT_TIMEOUT,
+        ).update(status=ShoppingCartExport.FAILED)
+        # Файлы PDF удаляет обработчик сигнала post_delete.
+        deleted_count, _ = ShoppingCartExport.objects.filter(
+            created__lt=now - settings.SHOPPING_CART_EXPORT_TTL
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'{settings.FAILED_CLEANUP_EXPORTS_MESSAGE}: {failed_count}\n'
+            f'{settings.SUCCES_CLEANUP_EXPORTS_MESSAGE}: {deleted_count}'
+        ))
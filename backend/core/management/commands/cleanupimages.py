@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = settings.HELP_CLEANUP_IMAGES_MESSAGE
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести неиспользуемые файлы, не удаляя их',
+        )
+
+    def get_referenced_names(self):
+        referenced = set()
+        recipes = Recipe.objects.values_list('image', 'image_variants')
+        for image_name, variants in recipes.iterator():
+            referenced.add(image_name)
+            for files in variants.values():
+                referenced.update(files.values())
+        return referenced
+
+    def handle(self, *args, **options):
+        field = Recipe._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to.rstrip('/')
+        modified_before = (
+            timezone.now() - settings.RECIPE_IMAGE_CLEANUP_GRACE_PERIOD
+        ).timestamp()
+        # Ссылки собираются до обхода файлов: файлы, сохранённые позже,
+        # не успеют выйти из отсрочки.
+        referenced = self.get_referenced_names()
+        deleted_count = 0
+        files = (
+            storage.iter_files(directory) if storage.exists(directory)
+            else ()
+        )
+        for name, modified in files:
+            if name in referenced or modified > modified_before:
+                continue
+            if options['dry_run']:
+                self.stdout.write(name)
+            elif not storage.delete_unmodified(name, modified_before):
+                continue
+            deleted_count += 1
+        message = (
+            settings.DRY_RUN_CLEANUP_IMAGES_MESSAGE if options['dry_run']
+            else settings.SUCCES_CLEANUP_IMAGES_MESSAGE
+        )
+        self.stdout.write(self.style.SUCCESS(f'{message}: {deleted_count}'))
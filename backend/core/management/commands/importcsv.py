@@ -1,21 +1,14 @@
 import csv
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
 
-from core.utils import load_ingredients_data
+from core.management.base import ImportIngredientsCommand
 
 
-class Command(BaseCommand):
+class Command(ImportIngredientsCommand):
     help = settings.HELP_IMPORT_CSV_MESSAGE
+    default_path = settings.CSV_PATH
 
-    def handle(self, *args, **kwargs):
-        with open(settings.CSV_PATH, 'r') as csv_file:
-            data = csv.DictReader(csv_file)
-            load_ingredients_data(data)
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                settings.SUCCES_IMPORT_MESSAGE
-            )
-        )
+    def read_data(self, path):
+        with open(path, 'r', newline='') as csv_file:
+            yield from csv.DictReader(csv_file)
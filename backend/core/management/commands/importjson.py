@@ -1,21 +1,13 @@
-import json
-
 from django.conf import settings
-from django.core.management.base import BaseCommand
 
-from core.utils import load_ingredients_data
+from core.management.base import ImportIngredientsCommand
+from core.importing import iter_json_records
 
 
-class Command(BaseCommand):
+class Command(ImportIngredientsCommand):
     help = settings.HELP_IMPORT_JSON_MESSAGE
+    default_path = settings.JSON_PATH
 
-    def handle(self, *args, **kwargs):
-        with open(settings.JSON_PATH, 'rb') as json_file:
-            data = json.load(json_file)
-            load_ingredients_data(data)
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                settings.SUCCES_IMPORT_MESSAGE
-            )
-        )
+    def read_data(self, path):
+        with open(path, 'r', encoding='utf-8') as json_file:
+            yield from iter_json_records(json_file)
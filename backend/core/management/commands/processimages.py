@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.tasks import process_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = settings.HELP_PROCESS_IMAGES_MESSAGE
+
+    def handle(self, *args, **kwargs):
+        recipes = Recipe.objects.filter(image_variants={}).exclude(
+            image=''
+        ).values_list('id', 'image')
+        processed_count = 0
+        for recipe_id, image_name in recipes.iterator():
+            process_recipe_image(recipe_id, image_name)
+            processed_count += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{settings.SUCCES_PROCESS_IMAGES_MESSAGE}: {processed_count}'
+            )
+        )
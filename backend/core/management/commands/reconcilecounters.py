@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_recipe_counters
+
+
+class Command(BaseCommand):
+    help = settings.HELP_RECONCILE_COUNTERS_MESSAGE
+
+    def handle(self, *args, **kwargs):
+        fixed_count = reconcile_recipe_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{settings.SUCCES_RECONCILE_COUNTERS_MESSAGE}: '
+                f'{fixed_count}'
+            )
+        )
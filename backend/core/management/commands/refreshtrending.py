@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.trending import refresh_trending_recipes
+
+
+class Command(BaseCommand):
+    help = settings.HELP_REFRESH_TRENDING_MESSAGE
+
+    def handle(self, *args, **kwargs):
+        updated_count = refresh_trending_recipes()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{settings.SUCCES_REFRESH_TRENDING_MESSAGE}: '
+                f'{updated_count}'
+            )
+        )
@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seed import seed_bench_data
+
+
+class Command(BaseCommand):
+    help = settings.HELP_SEED_BENCH_MESSAGE
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('--users', 1000, 'Количество пользователей'),
+            ('--recipes', 10000, 'Количество рецептов'),
+            ('--favorites', 50000, 'Количество добавлений в избранное'),
+            ('--purchases', 20000, 'Количество добавлений в список покупок'),
+            ('--subscriptions', 10000, 'Количество подписок'),
+            (
+                '--ingredients-per-recipe', 8,
+                'Максимальное количество ингредиентов в рецепте'
+            ),
+            ('--tags-per-recipe', 2, 'Максимальное количество тегов рецепта'),
+            (
+                '--batch-size', settings.IMPORT_BATCH_SIZE,
+                'Количество строк в одном INSERT'
+            ),
+        ):
+            parser.add_argument(
+                name, type=int, default=default, help=help_text
+            )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для активности '
+                 'пользователей и популярности рецептов',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Начальное значение генератора случайных чисел',
+        )
+
+    def handle(self, *args, **options):
+        for name in (
+            'users', 'batch_size', 'ingredients_per_recipe', 'tags_per_recipe'
+        ):
+            if options[name] < 1:
+                raise CommandError(
+                    f'--{name.replace("_", "-")} должен быть больше нуля'
+                )
+        started = time.perf_counter()
+        counts = seed_bench_data(
+            users_amount=options['users'],
+            recipes_amount=options['recipes'],
+            favorites_amount=options['favorites'],
+            purchases_amount=options['purchases'],
+            subscriptions_amount=options['subscriptions'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            tags_per_recipe=options['tags_per_recipe'],
+            skew=options['skew'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        elapsed = time.perf_counter() - started
+        rows_count = sum(counts.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{settings.SUCCES_SEED_BENCH_MESSAGE}: '
+                + ', '.join(f'{key} {count}' for key, count in counts.items())
+                + f' ({rows_count} строк за {elapsed:.2f} с, '
+                f'{rows_count / elapsed:.0f} строк/с)'
+            )
+        )
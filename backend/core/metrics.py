@@ -0,0 +1,162 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from rest_framework.serializers import BaseSerializer
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    '''Метрики одного запроса: количество и время SQL-запросов,
+    время сериализации и размер ответа.'''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.response_size = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+            'response_size': self.response_size,
+        }
+
+
+class EndpointHistogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_ms = 0.0
+        self.serializer_ms = 0.0
+        self.total_ms = 0.0
+        self.response_size = 0
+
+    def add(self, metrics):
+        self.requests += 1
+        self.counts[bisect_left(self.buckets, metrics['total_ms'])] += 1
+        self.queries += metrics['queries']
+        self.max_queries = max(self.max_queries, metrics['queries'])
+        self.sql_ms += metrics['sql_ms']
+        self.serializer_ms += metrics['serializer_ms']
+        self.total_ms += metrics['total_ms']
+        self.response_size += metrics['response_size']
+
+    def get_stats(self):
+        return {
+            'requests': self.requests,
+            'avg_queries': self.queries / self.requests,
+            'max_queries': self.max_queries,
+            'avg_sql_ms': self.sql_ms / self.requests,
+            'avg_serializer_ms': self.serializer_ms / self.requests,
+            'avg_total_ms': self.total_ms / self.requests,
+            'avg_response_size': self.response_size / self.requests,
+            'total_ms_histogram': {
+                **{
+                    f'le_{bucket}': count
+                    for bucket, count in zip(self.buckets, self.counts)
+                },
+                'le_inf': self.counts[-1],
+            },
+        }
+
+
+class RequestMetricsRegistry:
+    '''Гистограммы времени ответа и счётчики запросов к БД по
+    эндпоинтам. Данные хранятся в памяти процесса, у каждого
+    воркера gunicorn они свои.'''
+
+    def __init__(self):
+        self.lock = Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, metrics):
+        with self.lock:
+            if endpoint not in self.endpoints:
+                self.endpoints[endpoint] = EndpointHistogram(
+                    settings.REQUEST_METRICS_BUCKETS
+                )
+            self.endpoints[endpoint].add(metrics)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                endpoint: histogram.get_stats()
+                for endpoint, histogram in sorted(self.endpoints.items())
+            }
+
+    def clear(self):
+        with self.lock:
+            self.endpoints = {}
+
+
+request_metrics = RequestMetricsRegistry()
+
+
+def timed_serializer_data(data):
+    def get_data(serializer):
+        metrics = current_metrics.get()
+        # Вложенные сериализаторы, которые обращаются к .data внутри
+        # SerializerMethodField, учитываются во внешнем.
+        if metrics is None or metrics.serializing:
+            return data.fget(serializer)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            metrics.serializing = False
+            metrics.serializer_time += time.perf_counter() - started
+    get_data.original = data
+    return property(get_data)
+
+
+class SerializerTiming:
+    '''Контекст замера времени сериализации. Пока открыт хотя бы
+    один контекст, BaseSerializer.data подменено свойством с замером,
+    после выхода из последнего исходное свойство возвращается.'''
+
+    def __init__(self):
+        self.lock = Lock()
+        self.active = 0
+
+    def __enter__(self):
+        with self.lock:
+            if not self.active:
+                BaseSerializer.data = timed_serializer_data(
+                    BaseSerializer.data
+                )
+            self.active += 1
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.active -= 1
+            if not self.active:
+                BaseSerializer.data = BaseSerializer.data.fget.original
+
+
+serializer_timing = SerializerTiming()
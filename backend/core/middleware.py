@@ -0,0 +1,147 @@
+import json
+import logging
+import random
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core.metrics import (
+    RequestMetrics, current_metrics, request_metrics, serializer_timing
+)
+from core.routers import ReplicaState, current_replica_state
+
+logger = logging.getLogger(__name__)
+
+
+def get_endpoint_name(request):
+    match = request.resolver_match
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or match.route
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryMetricsMiddleware:
+    '''Считает запросы к БД, время SQL и сериализации для каждого
+    эндпоинта и отдаёт их в заголовке Server-Timing и в логе.
+
+    При REQUEST_METRICS_ENABLED = False исключается из цепочки
+    middleware при запуске и не добавляет накладных расходов.
+    '''
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    @contextmanager
+    def capture(self, metrics):
+        token = current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                stack.enter_context(serializer_timing)
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                yield
+        finally:
+            current_metrics.reset(token)
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        with self.capture(metrics):
+            response = self.get_response(request)
+        endpoint = get_endpoint_name(request)
+        if response.streaming:
+            response['Server-Timing'] = self.get_server_timing(metrics)
+            response.streaming_content = self.stream(
+                response.streaming_content, metrics, endpoint, request,
+                response.status_code
+            )
+            return response
+        metrics.response_size = len(response.content)
+        response['Server-Timing'] = self.get_server_timing(metrics)
+        self.record(endpoint, metrics, request, response.status_code)
+        return response
+
+    def stream(self, content, metrics, endpoint, request, status_code):
+        # Запросы, выполняемые при отдаче потокового ответа, учитываются
+        # в логе и гистограммах, но не в уже отправленных заголовках.
+        with self.capture(metrics):
+            for chunk in content:
+                metrics.response_size += len(chunk)
+                yield chunk
+        self.record(endpoint, metrics, request, status_code)
+
+    def get_server_timing(self, metrics):
+        return (
+            f'db;dur={metrics.sql_time * 1000:.2f};'
+            f'desc="{metrics.queries} queries", '
+            f'serializer;dur={metrics.serializer_time * 1000:.2f}, '
+            f'total;dur={metrics.total_time * 1000:.2f}'
+        )
+
+    def record(self, endpoint, metrics, request, status_code):
+        data = metrics.as_dict()
+        request_metrics.record(endpoint, data)
+        logger.info(json.dumps({
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': status_code,
+            **data,
+        }))
+
+
+class ReadReplicaMiddleware:
+    '''Отправляет чтения безопасных запросов к эндпоинтам из
+    DATABASE_REPLICA_ENDPOINTS в случайную реплику.
+
+    После запроса, который записал в БД, клиент получает cookie
+    DATABASE_PRIMARY_COOKIE и на DATABASE_PRIMARY_STICKY_SECONDS
+    закрепляется за основной БД, чтобы видеть свои изменения.
+    '''
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = ReplicaState()
+        token = current_replica_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_replica_state.reset(token)
+        if state.wrote:
+            response.set_cookie(
+                settings.DATABASE_PRIMARY_COOKIE,
+                '1',
+                max_age=settings.DATABASE_PRIMARY_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            or settings.DATABASE_PRIMARY_COOKIE in request.COOKIES
+        ):
+            return
+        endpoint = get_endpoint_name(request)
+        if (
+            endpoint in settings.DATABASE_REPLICA_ENDPOINTS
+            or endpoint.split('.')[0] in settings.DATABASE_REPLICA_ENDPOINTS
+        ):
+            current_replica_state.get().replica = random.choice(
+                settings.DATABASE_REPLICAS
+            )
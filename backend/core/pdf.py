@@ -0,0 +1,195 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+import weakref
+from collections import namedtuple
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus.frames import Frame
+from xhtml2pdf.builders.watermarks import WaterMarks
+from xhtml2pdf.context import pisaContext, pisaCSSBuilder, pisaCSSParser
+from xhtml2pdf.util import getBox
+from xhtml2pdf.w3c import css
+from xhtml2pdf.xhtml2pdf_reportlab import PmlBaseDoc, PmlPageTemplate
+
+PDF_RESOURCES_DIR = os.path.join(
+    tempfile.gettempdir(), 'foodgram_pdf_resources'
+)
+PDF_IMAGE_FORMATS = {'image/jpeg': 'JPEG', 'image/png': 'PNG'}
+PDF_RESOURCES_CACHE_SIZE = 256
+PDF_STYLESHEETS_CACHE_SIZE = 16
+
+
+def get_pdf_resource(path):
+    prepared_path = prepare_pdf_resource(path)
+    if not os.path.exists(prepared_path):
+        # Временный каталог могли очистить: файл готовится заново.
+        prepared_path = prepare_pdf_resource.__wrapped__(path)
+    return prepared_path
+
+
+@lru_cache(maxsize=PDF_RESOURCES_CACHE_SIZE)
+def prepare_pdf_resource(path):
+    image_format = PDF_IMAGE_FORMATS.get(mimetypes.guess_type(path)[0])
+    if image_format is None or not os.path.isfile(path):
+        return path
+    with Image.open(path) as image:
+        max_width, max_height = settings.PDF_IMAGE_MAX_SIZE
+        if image.width <= max_width and image.height <= max_height:
+            return path
+        stat = os.stat(path)
+        digest = hashlib.sha256(
+            f'{path}:{stat.st_mtime}:{settings.PDF_IMAGE_MAX_SIZE}'.encode()
+        ).hexdigest()
+        prepared_path = os.path.join(
+            PDF_RESOURCES_DIR, digest + os.path.splitext(path)[1]
+        )
+        if not os.path.exists(prepared_path):
+            os.makedirs(PDF_RESOURCES_DIR, exist_ok=True)
+            image.thumbnail(settings.PDF_IMAGE_MAX_SIZE)
+            temp_path = f'{prepared_path}.{os.getpid()}.tmp'
+            image.save(temp_path, image_format, optimize=True)
+            os.replace(temp_path, prepared_path)
+    return prepared_path
+
+
+class PDFStyleBuilder(pisaCSSBuilder):
+    '''Построитель стилей xhtml2pdf, который запоминает правила @page
+    и @frame: они создают шаблоны страниц документа, поэтому для каждого
+    документа применяются заново.'''
+    c = property(lambda self: self._c())
+
+    def __init__(self, context):
+        super().__init__(mediumSet=['all', 'print', 'pdf'])
+        self._c = weakref.ref(context)
+        self.page_rules = []
+
+    def atPage(self, *args):
+        self.page_rules.append(('atPage', args))
+        return super().atPage(*args)
+
+    def atFrame(self, *args):
+        self.page_rules.append(('atFrame', args))
+        return super().atFrame(*args)
+
+
+class PDFStyleParser(pisaCSSParser):
+    c = property(lambda self: self._c())
+
+    def __init__(self, builder, context):
+        super().__init__(builder)
+        self._c = weakref.ref(context)
+        self.rootPath = context.pathDirectory
+
+
+PDFStylesheet = namedtuple(
+    'PDFStylesheet', ('css', 'css_default', 'page_rules', 'fonts')
+)
+
+
+@lru_cache(maxsize=PDF_STYLESHEETS_CACHE_SIZE)
+def get_pdf_stylesheet(css_text, css_default_text, path_callback):
+    '''Разбирает стили документа один раз на процесс. Шрифты из
+    @font-face регистрируются в reportlab при первом разборе, а
+    документы получают их через собственный список шрифтов.'''
+    context = pisaContext(None)
+    context.pathCallback = path_callback
+    context.cssBuilder = PDFStyleBuilder(context)
+    context.cssParser = PDFStyleParser(context.cssBuilder, context)
+    return PDFStylesheet(
+        css=context.cssParser.parse(css_text),
+        css_default=context.cssParser.parse(css_default_text),
+        page_rules=tuple(context.cssBuilder.page_rules),
+        fonts=dict(context.fontList),
+    )
+
+
+class PDFContext(pisaContext):
+    '''Контекст xhtml2pdf, который берёт разобранные стили и шрифты из
+    кэша процесса. Для документа заново строятся только шаблоны страниц
+    и раскладка содержимого.'''
+
+    def __init__(self, path_callback):
+        super().__init__(None)
+        self.pathCallback = path_callback
+
+    def parseCSS(self):
+        stylesheet = get_pdf_stylesheet(
+            self.cssText, self.cssDefaultText, self.pathCallback
+        )
+        self.fontList.update(stylesheet.fonts)
+        self.cssBuilder = PDFStyleBuilder(self)
+        self.cssParser = PDFStyleParser(self.cssBuilder, self)
+        for rule, args in stylesheet.page_rules:
+            getattr(self.cssBuilder, rule)(*args)
+        self.css = stylesheet.css
+        self.cssDefault = stylesheet.css_default
+        self.cssCascade = css.CSSCascadeStrategy(
+            userAgent=self.cssDefault, user=self.css
+        )
+        self.cssCascade.parser = self.cssParser
+
+
+def set_pdf_background(template):
+    '''Рисует фоновое изображение @page прямо на страницах шаблона.
+
+    xhtml2pdf накладывает фон после сборки документа: для каждой
+    страницы создаётся отдельный PDF с изображением и объединяется
+    со страницей через pypdf. Нарисованное на холсте изображение
+    встраивается в документ один раз и не требует объединения.
+    '''
+    background = template.pisaBackground
+    options = getattr(template, 'backgroundContext', {})
+    if (
+        background is None or background.notFound()
+        or not background.getMimeType().startswith('image/')
+        or options.get('opacity') or options.get('step', 1) != 1
+    ):
+        return
+    path = background.getNamedFile()
+    x, y, width, height = WaterMarks.get_size_location(
+        ImageReader(path), options, template.pagesize, template.isPortrait()
+    )
+    before_draw_page = template.beforeDrawPage
+
+    def draw_page(canvas, doc):
+        # Фон рисуется до статических фреймов шаблона, чтобы
+        # не перекрывать их.
+        canvas.drawImage(path, x, y, width, height, mask='auto')
+        before_draw_page(canvas, doc)
+
+    template.pisaBackground = None
+    template.beforeDrawPage = draw_page
+
+
+def build_pdf(context):
+    '''Собирает PDF из разобранного документа так же, как
+    pisa.pisaDocument.'''
+    out = BytesIO()
+    doc = PmlBaseDoc(out, pagesize=context.pageSize, showBoundary=0)
+    body = context.templateList.pop('body', None)
+    if body is None:
+        x, y, width, height = getBox('1cm 1cm -1cm -1cm', context.pageSize)
+        body = PmlPageTemplate(
+            id='body',
+            frames=[Frame(
+                x, y, width, height, id='body', leftPadding=0,
+                rightPadding=0, bottomPadding=0, topPadding=0
+            )],
+            pagesize=context.pageSize
+        )
+    templates = [body, *context.templateList.values()]
+    for template in templates:
+        set_pdf_background(template)
+    doc.addPageTemplates(templates)
+    if context.multiBuild:
+        doc.multiBuild(context.story)
+    else:
+        doc.build(context.story)
+    output, has_background = WaterMarks.process_doc(context, out, BytesIO())
+    return (output if has_background else out).getvalue()
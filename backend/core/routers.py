@@ -0,0 +1,41 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+current_replica_state = ContextVar('current_replica_state', default=None)
+
+
+class ReplicaState:
+    '''Реплика, из которой читает текущий запрос. После первой записи
+    все чтения запроса идут в основную БД.'''
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+class ReadReplicaRouter:
+    '''Направляет чтения запросов, отмеченных ReadReplicaMiddleware,
+    в реплику, а запись и все остальные чтения — в основную БД.'''
+
+    def db_for_read(self, model, **hints):
+        state = current_replica_state.get()
+        if state is None or state.wrote or state.replica is None:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = current_replica_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,250 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.counters import reconcile_recipe_counters
+from core.importing import load_ingredients_data
+from core.utils import batched
+from recipes.models import (
+    Favorite, Ingredient, IngredientRecipe, Purchase, Recipe, Tag
+)
+from users.models import Subscription
+
+
+def insert_rows(model, columns, rows, batch_size=settings.IMPORT_BATCH_SIZE):
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(column) for column in columns]
+    batch_size = connection.ops.bulk_batch_size(fields, range(batch_size))
+    statement = (
+        f'INSERT INTO {quote_name(model._meta.db_table)} '
+        f'({", ".join(quote_name(field.column) for field in fields)}) '
+        'VALUES '
+    )
+    placeholders = f'({", ".join(["%s"] * len(fields))})'
+    rows_count = 0
+    with connection.cursor() as cursor:
+        for batch in batched(rows, batch_size):
+            cursor.execute(
+                statement + ', '.join([placeholders] * len(batch)),
+                [value for row in batch for value in row]
+            )
+            rows_count += len(batch)
+    return rows_count
+
+
+def get_zipf_weights(amount, skew):
+    return [1 / rank ** skew for rank in range(1, amount + 1)]
+
+
+def split_by_weights(total, weights):
+    weights_sum = sum(weights)
+    return [round(total * weight / weights_sum) for weight in weights]
+
+
+def iter_seed_datetimes(rng, now):
+    period = settings.SEED_BENCH_PERIOD.total_seconds()
+    while True:
+        yield connection.ops.adapt_datetimefield_value(
+            now - timedelta(seconds=rng.uniform(0, period))
+        )
+
+
+def pick_distinct(population, cum_weights, amount, rng, excluded=None):
+    # Выборка по весам для самых активных пользователей даёт много
+    # повторов, поэтому недостающие значения добираются равномерно.
+    picked = set(rng.choices(population, cum_weights=cum_weights, k=amount))
+    picked.discard(excluded)
+    while len(picked) < amount:
+        picked.update(rng.sample(population, amount - len(picked)))
+        picked.discard(excluded)
+    return picked
+
+
+def iter_user_recipe_rows(user_ids, recipe_ids, total, rng, skew, now):
+    # Активность пользователей и популярность рецептов подчиняются
+    # закону Ципфа: немногие пользователи и рецепты дают большую часть
+    # добавлений, как и в реальном трафике.
+    if not recipe_ids:
+        return
+    recipes = rng.sample(recipe_ids, len(recipe_ids))
+    recipe_weights = list(accumulate(get_zipf_weights(len(recipes), skew)))
+    users = rng.sample(user_ids, len(user_ids))
+    counts = split_by_weights(total, get_zipf_weights(len(users), skew))
+    datetimes = iter_seed_datetimes(rng, now)
+    for user_id, count in zip(users, counts):
+        for recipe_id in pick_distinct(
+            recipes, recipe_weights, min(count, len(recipes)), rng
+        ):
+            yield user_id, recipe_id, next(datetimes)
+
+
+def iter_subscription_rows(user_ids, total, rng, skew):
+    authors = rng.sample(user_ids, len(user_ids))
+    author_weights = list(accumulate(get_zipf_weights(len(authors), skew)))
+    counts = split_by_weights(
+        total, get_zipf_weights(len(user_ids), skew)
+    )
+    for user_id, count in zip(rng.sample(user_ids, len(user_ids)), counts):
+        for author_id in pick_distinct(
+            authors, author_weights, min(count, len(authors) - 1), rng,
+            excluded=user_id
+        ):
+            yield user_id, author_id
+
+
+def get_new_ids(model, last_id):
+    return list(
+        model.objects.filter(id__gt=last_id).order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def get_last_id(model):
+    return model.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+
+
+def seed_bench_data(
+    users_amount,
+    recipes_amount,
+    favorites_amount,
+    purchases_amount,
+    subscriptions_amount,
+    ingredients_per_recipe=5,
+    tags_per_recipe=2,
+    skew=1.1,
+    seed=None,
+    batch_size=settings.IMPORT_BATCH_SIZE,
+):
+    rng = random.Random(seed)
+    now = timezone.now()
+    User = get_user_model()
+    with transaction.atomic():
+        if not Ingredient.objects.exists():
+            load_ingredients_data(
+                {
+                    'name': f'Ингредиент {index}',
+                    'measurement_unit': rng.choice(('г', 'мл', 'шт.')),
+                }
+                for index in range(settings.SEED_BENCH_INGREDIENTS_AMOUNT)
+            )
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, slug=slug, color=color)
+                for name, slug, color in (
+                    ('Завтрак', 'breakfast', '#E26C2D'),
+                    ('Обед', 'lunch', '#49B64E'),
+                    ('Ужин', 'dinner', '#8775D2'),
+                )
+            )
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+        last_user_id = get_last_id(User)
+        password = make_password(settings.SEED_BENCH_PASSWORD)
+        date_joined = connection.ops.adapt_datetimefield_value(now)
+        counts = {'users': insert_rows(
+            User,
+            (
+                'username', 'email', 'first_name', 'last_name', 'password',
+                'is_superuser', 'is_staff', 'is_active', 'date_joined'
+            ),
+            (
+                (
+                    f'bench{index}', f'bench{index}@foodgram.test',
+                    'Имя', 'Фамилия', password, False, False, True,
+                    date_joined
+                )
+                for index in range(
+                    last_user_id + 1, last_user_id + users_amount + 1
+                )
+            ),
+            batch_size
+        )}
+        user_ids = get_new_ids(User, last_user_id)
+
+        last_recipe_id = get_last_id(Recipe)
+        author_weights = list(accumulate(
+            get_zipf_weights(len(user_ids), skew)
+        ))
+        authors = rng.sample(user_ids, len(user_ids))
+        datetimes = iter_seed_datetimes(rng, now)
+        counts['recipes'] = insert_rows(
+            Recipe,
+            (
+                'author', 'name', 'image', 'image_variants', 'text',
+                'cooking_time', 'pub_date', 'updated_at', 'favorites_count',
+                'in_carts_count'
+            ),
+            (
+                (
+                    author_id, f'Рецепт {last_recipe_id + index}',
+                    'recipe/images/bench.png', '{}', 'Описание рецепта',
+                    rng.randint(5, 180), pub_date, pub_date, 0, 0
+                )
+                for index, author_id, pub_date in zip(
+                    range(1, recipes_amount + 1),
+                    rng.choices(
+                        authors, cum_weights=author_weights,
+                        k=recipes_amount
+                    ),
+                    datetimes
+                )
+            ),
+            batch_size
+        )
+        recipe_ids = get_new_ids(Recipe, last_recipe_id)
+
+        counts['tags'] = insert_rows(
+            Recipe.tags.through,
+            ('recipe', 'tag'),
+            (
+                (recipe_id, tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(
+                    tag_ids, rng.randint(1, min(tags_per_recipe, len(tag_ids)))
+                )
+            ),
+            batch_size
+        )
+        counts['ingredients'] = insert_rows(
+            IngredientRecipe,
+            ('recipe', 'ingredient', 'amount'),
+            (
+                (recipe_id, ingredient_id, rng.randint(1, 500))
+                for recipe_id in recipe_ids
+                for ingredient_id in rng.sample(
+                    ingredient_ids, rng.randint(
+                        1, min(ingredients_per_recipe, len(ingredient_ids))
+                    )
+                )
+            ),
+            batch_size
+        )
+        for key, model, amount in (
+            ('favorites', Favorite, favorites_amount),
+            ('purchases', Purchase, purchases_amount),
+        ):
+            counts[key] = insert_rows(
+                model,
+                ('user', 'recipe', 'created'),
+                iter_user_recipe_rows(
+                    user_ids, recipe_ids, amount, rng, skew, now
+                ),
+                batch_size
+            )
+        counts['subscriptions'] = insert_rows(
+            Subscription,
+            ('user', 'author'),
+            iter_subscription_rows(user_ids, subscriptions_amount, rng, skew),
+            batch_size
+        )
+        reconcile_recipe_counters(batch_size)
+    return counts
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import posixpath
+from uuid import uuid4
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    '''Сохраняет файлы под именем из SHA-256 содержимого, поэтому
+    одинаковые файлы записываются на диск один раз.
+
+    Один файл может использоваться несколькими рецептами, поэтому
+    файлы удаляются только через delete_unmodified.
+    '''
+
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        return posixpath.join(
+            posixpath.dirname(name),
+            digest[:2],
+            digest + os.path.splitext(name)[1].lower()
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        try:
+            # Время изменения показывает cleanupimages, что файл снова
+            # используется и его нельзя удалять до конца отсрочки.
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super().save(name, content, max_length)
+        return name
+
+    def iter_files(self, directory=''):
+        '''Обходит файлы каталога и вложенных каталогов, не загружая
+        их список в память. Возвращает пары (имя, время изменения).'''
+        with os.scandir(self.path(directory)) as entries:
+            for entry in entries:
+                name = posixpath.join(directory, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self.iter_files(name)
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry.stat().st_mtime
+
+    def delete_unmodified(self, name, modified_before):
+        '''Удаляет файл, если он не сохранялся заново после
+        modified_before. Возвращает True, если файл удалён.
+
+        Файл сначала переименовывается: одновременный save либо успеет
+        обновить время изменения и файл вернётся на место, либо
+        не найдёт файл и запишет его заново.
+        '''
+        path = self.path(name)
+        deleted_path = f'{path}.{uuid4().hex}.deleted'
+        try:
+            os.rename(path, deleted_path)
+        except FileNotFoundError:
+            return False
+        if os.stat(deleted_path).st_mtime > modified_before:
+            os.replace(deleted_path, path)
+            return False
+        os.remove(deleted_path)
+        return True
@@ -0,0 +1,55 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return _executor
+
+
+def reset_executor(executor):
+    '''Отбрасывает сломанный пул, чтобы следующая задача создала новый.
+    Задачи, выполнявшиеся в нём, потеряны: их отмечает ошибочными
+    команда cleanupexports.'''
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def run_with_connections(func, *args):
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args):
+    if not settings.BACKGROUND_WORKERS:
+        return func(*args)
+    executor = get_executor()
+    try:
+        return executor.submit(run_with_connections, func, *args)
+    except BrokenProcessPool:
+        # Рабочий процесс аварийно завершился, и пул больше не
+        # принимает задачи.
+        reset_executor(executor)
+        return get_executor().submit(run_with_connections, func, *args)
@@ -0,0 +1,70 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.utils import batched
+from recipes.models import Favorite, Purchase, RecipeTrend, TrendingState
+
+
+def get_trending_decay(age):
+    return math.exp(
+        -math.log(2) * age.total_seconds()
+        / settings.TRENDING_HALF_LIFE.total_seconds()
+    )
+
+
+def collect_trending_events(model, watermark, weight, scores, now):
+    cutoff = now - settings.TRENDING_WATERMARK_LAG
+    events = model.objects.filter(id__gt=watermark).order_by('id').values_list(
+        'id', 'recipe_id', 'created'
+    )
+    for event_id, recipe_id, created in events.iterator():
+        # Записи моложе cutoff могут принадлежать ещё не завершённым
+        # транзакциям с меньшим id, поэтому они ждут следующего запуска.
+        if created >= cutoff:
+            break
+        scores[recipe_id] += weight * get_trending_decay(now - created)
+        watermark = event_id
+    return watermark
+
+
+def refresh_trending_recipes(now=None):
+    now = now or timezone.now()
+    with transaction.atomic():
+        state, _ = TrendingState.objects.select_for_update().get_or_create(
+            pk=1
+        )
+        if state.refreshed_at is not None:
+            RecipeTrend.objects.update(
+                score=F('score') * get_trending_decay(now - state.refreshed_at)
+            )
+            RecipeTrend.objects.filter(
+                score__lt=settings.TRENDING_MIN_SCORE
+            ).delete()
+        scores = defaultdict(float)
+        state.favorite_watermark = collect_trending_events(
+            Favorite, state.favorite_watermark,
+            settings.TRENDING_FAVORITE_WEIGHT, scores, now
+        )
+        state.purchase_watermark = collect_trending_events(
+            Purchase, state.purchase_watermark,
+            settings.TRENDING_PURCHASE_WEIGHT, scores, now
+        )
+        for batch in batched(scores.items(), settings.IMPORT_BATCH_SIZE):
+            batch = dict(batch)
+            trends = RecipeTrend.objects.in_bulk(batch.keys())
+            for recipe_id, trend in trends.items():
+                trend.score += batch[recipe_id]
+            RecipeTrend.objects.bulk_update(trends.values(), ('score',))
+            RecipeTrend.objects.bulk_create(
+                RecipeTrend(recipe_id=recipe_id, score=score)
+                for recipe_id, score in batch.items()
+                if recipe_id not in trends
+            )
+        state.refreshed_at = now
+        state.save()
+    return len(scores)
@@ -1,13 +1,13 @@
+import base64
 import os
-from io import BytesIO
+from itertools import islice
 
 from django.conf import settings
-from django.db import transaction
-from django.http import HttpResponse
 from django.template.loader import get_template
-from xhtml2pdf import pisa
+from xhtml2pdf.document import pisaStory
+from xhtml2pdf.files import cleanFiles
 
-from recipes.models import Ingredient, Unit
+from core.pdf import PDFContext, build_pdf, get_pdf_resource
 
 
 def fetch_pdf_resources(uri, rel):
@@ -20,30 +20,45 @@ def fetch_pdf_resources(uri, rel):
             settings.STATIC_ROOT, uri.replace(settings.STATIC_URL, '')
         )
     else:
-        path = None
-    return path
+        return None
+    return get_pdf_resource(path)
 
 
 def render_to_pdf(template_src, context_dict={}):
+    # Скомпилированный шаблон кэширует загрузчик шаблонов Django.
     template = get_template(template_src)
     html = template.render(context_dict)
-    result = BytesIO()
-    pdf = pisa.pisaDocument(
-        BytesIO(html.encode("UTF-8")), result,
-        encoding='UTF-8',
-        link_callback=fetch_pdf_resources,
-    )
-    if not pdf.err:
-        return HttpResponse(result.getvalue(), content_type='application/pdf')
-
-
-def load_ingredients_data(ingredient_data):
-    for row in ingredient_data:
-        ingredient_name = row['name']
-        unit_name = row['measurement_unit']
-        with transaction.atomic():
-            unit, _ = Unit.objects.get_or_create(name=unit_name)
-            Ingredient.objects.get_or_create(
-                name=ingredient_name,
-                measurement_unit=unit
-            )
+    try:
+        context = pisaStory(
+            html, encoding='UTF-8',
+            context=PDFContext(fetch_pdf_resources)
+        )
+        if not context.err:
+            return build_pdf(context)
+    finally:
+        cleanFiles()
+
+
+def get_base64_decoded_size(encoded, start=0):
+    length = len(encoded) - start
+    if length % 4:
+        raise ValueError('Длина base64 должна быть кратна 4')
+    return length // 4 * 3 - encoded.endswith('==') - encoded.endswith('=')
+
+
+def iter_base64_chunks(
+        encoded, start=0, chunk_size=settings.BASE64_DECODE_CHUNK_SIZE
+):
+    '''Декодирует base64 из строки, начиная с позиции start, частями
+    по chunk_size символов, не копируя строку целиком.'''
+    chunk_size -= chunk_size % 4
+    for position in range(start, len(encoded), chunk_size):
+        yield base64.b64decode(
+            encoded[position:position + chunk_size], validate=True
+        )
+
+
+def batched(iterable, batch_size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -33,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryMetricsMiddleware',
+    'core.middleware.ReadReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,13 +69,37 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodgram_backend.wsgi.application'
 
 
+# Пул соединений для потоковых воркеров gunicorn (--threads): потоки
+# процесса делят не больше DB_POOL_MAX_SIZE соединений и возвращают их
+# в пул после каждого запроса.
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+# Проверять переиспользуемое соединение перед первым запросом к БД,
+# чтобы разорванное сервером соединение не приводило к ошибке.
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'False') == 'True'
+
 POSTGRES_SETTINGS = {
-    'ENGINE': 'django.db.backends.postgresql',
+    # Пул и проверку соединений добавляет движок core.db.postgresql,
+    # без них используется стандартный движок Django.
+    'ENGINE': (
+        'core.db.postgresql' if DB_POOL or DB_CONN_HEALTH_CHECKS
+        else 'django.db.backends.postgresql'
+    ),
     'NAME': os.getenv('POSTGRES_DB', 'django'),
     'USER': os.getenv('POSTGRES_USER', 'django'),
     'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
     'HOST': os.getenv('DB_HOST', ''),
-    'PORT': os.getenv('DB_PORT', 5432)
+    'PORT': os.getenv('DB_PORT', 5432),
+    # Сколько секунд соединение переиспользуется между запросами:
+    # 0 — новое соединение на каждый запрос.
+    'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+    'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+    'OPTIONS': {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        },
+    } if DB_POOL else {},
 }
 
 SQLITE_SETTINGS = {
@@ -84,6 +111,63 @@ DATABASES = {
     'default': (POSTGRES_SETTINGS, SQLITE_SETTINGS)[os.getenv('DATABASE') == 'sqlite']
 }
 
+# Реплики только для чтения через запятую: хосты PostgreSQL (host или
+# host:port) или, при DATABASE=sqlite, пути к файлам SQLite.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    if os.getenv('DATABASE') == 'sqlite':
+        replica_settings = {'NAME': replica}
+    else:
+        host, _, port = replica.partition(':')
+        replica_settings = {
+            'HOST': host, 'PORT': port or POSTGRES_SETTINGS['PORT']
+        }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+    DATABASES[DATABASE_REPLICAS[-1]] = {
+        **DATABASES['default'],
+        **replica_settings,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.ReadReplicaRouter']
+# Безопасные запросы к этим эндпоинтам (класс представления или
+# класс и действие) читают из реплик.
+DATABASE_REPLICA_ENDPOINTS = (
+    'RecipeViewSet.list',
+    'RecipeViewSet.retrieve',
+    'RecipeViewSet.trending',
+    'IngredientViewSet',
+    'TagViewSet',
+    'UserViewSet.list',
+)
+# После записи клиент читает из основной БД в течение этого времени.
+DATABASE_PRIMARY_COOKIE = 'use_primary_db'
+DATABASE_PRIMARY_STICKY_SECONDS = int(
+    os.getenv('DB_PRIMARY_STICKY_SECONDS', 5)
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shopping_cart': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'SHOPPING_CART_CACHE_DIR',
+            os.path.join(BASE_DIR, 'cache', 'shopping_cart')
+        ),
+        'TIMEOUT': int(
+            os.getenv('SHOPPING_CART_CACHE_TIMEOUT', 60 * 60 * 24)
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.getenv('SHOPPING_CART_CACHE_MAX_ENTRIES', 1000)
+            ),
+        },
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -157,6 +241,10 @@ MAX_LENGTH_UNIT_NAME = 200
 MAX_LENGTH_TAG_NAME = 200
 MAX_LENGTH_TAG_COLOR = 7
 
+# ShoppingCartExport model
+
+MAX_LENGTH_EXPORT_STATUS = 16
+
 #############################################################################
 #                            DRF settings
 #############################################################################
@@ -206,10 +294,138 @@ ALLOWED_USER_ACTIONS = [
 
 
 JSON_PATH = 'static/data/ingredients.json'
-HELP_IMPORT_JSON_MESSAGE = 'Импорт данных из .json'
+HELP_IMPORT_JSON_MESSAGE = 'Импорт данных из .json (массив или JSON Lines)'
 
 CSV_PATH = 'static/data/ingredients.csv'
 HELP_IMPORT_CSV_MESSAGE = 'Импорт данных из .csv'
 
 
 SUCCES_IMPORT_MESSAGE = 'Загрузка данных завершена'
+DRY_RUN_IMPORT_MESSAGE = 'Проверка данных завершена, изменения не сохранены'
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+IMPORT_JSON_CHUNK_SIZE = 64 * 1024
+IMPORT_JSON_MAX_RECORD_SIZE = 1024 * 1024
+
+HELP_RECONCILE_COUNTERS_MESSAGE = (
+    'Пересчёт счётчиков избранного и списков покупок у рецептов'
+)
+SUCCES_RECONCILE_COUNTERS_MESSAGE = 'Исправлено рецептов'
+
+HELP_REFRESH_TRENDING_MESSAGE = 'Пересчёт рейтинга популярных рецептов'
+SUCCES_REFRESH_TRENDING_MESSAGE = 'Обновлено рецептов в рейтинге'
+# Вклад добавления в избранное и в список покупок в рейтинг рецепта
+# уменьшается вдвое за TRENDING_HALF_LIFE.
+TRENDING_HALF_LIFE = timedelta(days=3)
+TRENDING_FAVORITE_WEIGHT = 1.0
+TRENDING_PURCHASE_WEIGHT = 0.5
+TRENDING_MIN_SCORE = 0.01
+TRENDING_WATERMARK_LAG = timedelta(minutes=1)
+
+HELP_PROCESS_IMAGES_MESSAGE = (
+    'Создание вариантов картинок для рецептов, загруженных до их появления'
+)
+SUCCES_PROCESS_IMAGES_MESSAGE = 'Обработано картинок'
+
+HELP_CLEANUP_IMAGES_MESSAGE = (
+    'Удаление файлов картинок, на которые не ссылается ни один рецепт'
+)
+SUCCES_CLEANUP_IMAGES_MESSAGE = 'Удалено файлов'
+DRY_RUN_CLEANUP_IMAGES_MESSAGE = 'Найдено неиспользуемых файлов'
+# Файлы моложе отсрочки не удаляются: они могут принадлежать ещё
+# не сохранённому или не обработанному рецепту.
+RECIPE_IMAGE_CLEANUP_GRACE_PERIOD = timedelta(days=1)
+
+HELP_CLEANUP_EXPORTS_MESSAGE = (
+    'Удаление устаревших выгрузок списков покупок и отметка '
+    'зависших задач ошибочными'
+)
+SUCCES_CLEANUP_EXPORTS_MESSAGE = 'Удалено выгрузок'
+FAILED_CLEANUP_EXPORTS_MESSAGE = 'Отмечено зависших задач'
+# Задача, не завершившаяся за это время, считается потерянной:
+# например, рабочий процесс аварийно завершился.
+SHOPPING_CART_EXPORT_TIMEOUT = timedelta(minutes=10)
+# Срок хранения выгрузок списков покупок вместе с файлами PDF.
+SHOPPING_CART_EXPORT_TTL = timedelta(days=1)
+
+HELP_SEED_BENCH_MESSAGE = (
+    'Заполнение базы синтетическими данными для нагрузочных тестов'
+)
+SUCCES_SEED_BENCH_MESSAGE = 'Синтетические данные созданы'
+# Пароль всех созданных пользователей, чтобы нагрузочные тесты
+# могли получить токен через /api/auth/token/login/.
+SEED_BENCH_PASSWORD = os.getenv('SEED_BENCH_PASSWORD', 'bench-password')
+# Даты публикации рецептов и добавления в избранное равномерно
+# распределяются по последним SEED_BENCH_PERIOD.
+SEED_BENCH_PERIOD = timedelta(days=365)
+SEED_BENCH_INGREDIENTS_AMOUNT = 2000
+
+
+SHOPPING_CART_CACHE = 'shopping_cart'
+
+# Количество запросов к БД, время SQL и сериализации по эндпоинтам:
+# заголовок Server-Timing, лог core.middleware и /api/metrics/.
+REQUEST_METRICS_ENABLED = (
+    os.getenv('REQUEST_METRICS_ENABLED', 'False') == 'True'
+)
+# Верхние границы корзин гистограммы времени ответа, мс.
+REQUEST_METRICS_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+INGREDIENT_AUTOCOMPLETE_LIMIT = 20
+# Отдавать список ингредиентов из каталога в памяти процесса. Поиск
+# по названию на PostgreSQL всё равно идёт по индексам БД.
+INGREDIENT_CATALOGUE_CACHE = (
+    os.getenv('INGREDIENT_CATALOGUE_CACHE', 'True') == 'True'
+)
+
+PDF_IMAGE_MAX_SIZE = (1240, 1754)
+
+# Количество процессов для фоновых задач: формирования PDF со списком
+# покупок и обработки изображений рецептов. При значении 0 задачи
+# выполняются синхронно в процессе запроса.
+BACKGROUND_WORKERS = int(os.getenv(
+    'BACKGROUND_WORKERS', os.getenv('SHOPPING_CART_RENDER_WORKERS', 2)
+))
+
+# Варианты изображения рецепта: наибольшие ширина и высота. Исходный
+# файл после обработки заменяется вариантом full без метаданных EXIF.
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (320, 320),
+    'card': (800, 600),
+    'full': (1600, 1600),
+}
+RECIPE_IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+RECIPE_IMAGE_VARIANTS_DIR = 'recipe/images/variants/'
+# Изображения больше этого количества пикселей не обрабатываются.
+RECIPE_IMAGE_MAX_PIXELS = 50_000_000
+# Картинка рецепта в формате data URL размером до RECIPE_IMAGE_MAX_SIZE
+# байт декодируется частями по BASE64_DECODE_CHUNK_SIZE символов во
+# временный файл, который переносится на диск после
+# FILE_UPLOAD_MAX_MEMORY_SIZE байт.
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', 10 * 1024 * 1024)
+)
+# Допустимые типы картинок и сигнатуры начала их содержимого.
+RECIPE_IMAGE_MIME_TYPES = {
+    'image/jpeg': rb'\xff\xd8\xff',
+    'image/png': rb'\x89PNG\r\n\x1a\n',
+    'image/gif': rb'GIF8[79]a',
+    'image/webp': rb'RIFF.{4}WEBP',
+}
+BASE64_DECODE_CHUNK_SIZE = 64 * 1024
@@ -2,7 +2,7 @@ from django.contrib import admin
 
 from recipes.models import (
     Favorite, Ingredient, IngredientRecipe, Purchase,
-    Recipe, Tag, Unit
+    Recipe, ShoppingCartExport, Tag, Unit
 )
 
 
@@ -16,7 +16,7 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = (IngredientInline, )
     list_filter = ('author', 'tags')
     search_fields = ('name',)
-    list_display = ('name', 'author', 'count_favorites')
+    list_display = ('name', 'author', 'count_favorites', 'in_carts_count')
     fields = (
         'name', 'author', 'tags', 'text', 'cooking_time', 'image',
         'count_favorites'
@@ -24,14 +24,13 @@ class RecipeAdmin(admin.ModelAdmin):
     readonly_fields = ('count_favorites',)
 
     def count_favorites(self, instance):
-        count = Favorite.objects.filter(
-            recipe=instance
-        ).count()
+        count = instance.favorites_count
         measurment_unit = 'раз'
         measurment_unit += 'а' if str(count)[-1] in '234' else ''
         return f'{count} {measurment_unit}'
 
     count_favorites.short_description = 'Добавлено в избранное'
+    count_favorites.admin_order_field = 'favorites_count'
 
 
 class IngredientRecipeAdmin(admin.ModelAdmin):
@@ -53,3 +52,4 @@ admin.site.register(Tag)
 admin.site.register(IngredientRecipe, IngredientRecipeAdmin)
 admin.site.register(Purchase)
 admin.site.register(Favorite)
+admin.site.register(ShoppingCartExport)
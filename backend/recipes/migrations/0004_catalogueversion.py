@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_ingredient_name_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='версия')),
+            ],
+            options={
+                'verbose_name': 'Версия каталога ингредиентов',
+                'verbose_name_plural': 'Версии каталога ингредиентов',
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeTrend',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='recipes.recipe', verbose_name='рецепт')),
+                ('score', models.FloatField(default=0, verbose_name='рейтинг')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг популярности рецепта',
+                'verbose_name_plural': 'Рейтинги популярности рецептов',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('favorite_watermark', models.PositiveBigIntegerField(default=0, verbose_name='последнее учтённое избранное')),
+                ('purchase_watermark', models.PositiveBigIntegerField(default=0, verbose_name='последняя учтённая покупка')),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True, verbose_name='дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Состояние рейтинга популярности',
+                'verbose_name_plural': 'Состояния рейтинга популярности',
+            },
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='purchase',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='recipetrend',
+            index=models.Index(fields=['-score'], name='recipe_trend_score_idx'),
+        ),
+    ]
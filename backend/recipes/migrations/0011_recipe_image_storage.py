@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:51
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=core.storage.ContentAddressedStorage(), upload_to='recipe/images/', verbose_name='картинка'),
+        ),
+    ]
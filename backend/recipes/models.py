@@ -1,8 +1,10 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models, router
+from django.utils import timezone
 
+from core.storage import ContentAddressedStorage
 from core.validators import hex_color_validator
 
 
@@ -37,6 +39,10 @@ class Ingredient(StringRepresentationMixin, models.Model):
         related_name='ingredients',
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(
+        'дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         verbose_name = 'Ингредиент'
@@ -65,6 +71,10 @@ class Tag(StringRepresentationMixin, models.Model):
         unique=True
     )
     slug = models.SlugField(verbose_name='slug', unique=True)
+    updated_at = models.DateTimeField(
+        'дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -80,6 +90,10 @@ class UserRecipe(models.Model):
         'Recipe',
         on_delete=models.CASCADE,
     )
+    created = models.DateTimeField(
+        'дата добавления',
+        auto_now_add=True
+    )
 
     class Meta:
         abstract = True
@@ -110,6 +124,12 @@ class Favorite(UserRecipe):
     class Meta:
         ordering = ('id',)
         verbose_name_plural = verbose_name = 'Избранное'
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='favorite_user_id_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'recipe'],
@@ -129,7 +149,9 @@ class IngredientRecipe(models.Model):
         'Recipe',
         verbose_name='рецепт',
         on_delete=models.CASCADE,
-        related_name='ingredients'
+        related_name='ingredients',
+        # Поиск по рецепту обслуживает ingredient_recipe_covering_idx.
+        db_index=False
     )
 
     amount = models.PositiveSmallIntegerField(
@@ -143,6 +165,12 @@ class IngredientRecipe(models.Model):
     class Meta:
         verbose_name = 'Ингредиент для рецепта'
         verbose_name_plural = 'Ингредиенты для рецептов'
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient', 'amount'],
+                name='ingredient_recipe_covering_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.ingredient.name} x {self.amount} для {self.recipe.name}'
@@ -159,6 +187,12 @@ class Recipe(StringRepresentationMixin, models.Model):
     image = models.ImageField(
         verbose_name='картинка',
         upload_to='recipe/images/',
+        storage=ContentAddressedStorage(),
+    )
+    image_variants = models.JSONField(
+        verbose_name='варианты картинки',
+        default=dict,
+        blank=True,
     )
     text = models.TextField(verbose_name='описание',)
     tags = models.ManyToManyField(Tag, verbose_name='теги',)
@@ -173,6 +207,18 @@ class Recipe(StringRepresentationMixin, models.Model):
         'дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'дата изменения',
+        auto_now=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='добавлений в избранное',
+        default=0
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='добавлений в список покупок',
+        default=0
+    )
 
     def __str__(self):
         return super().__str__() + f' автор {self.author.get_username()}'
@@ -181,9 +227,157 @@ class Recipe(StringRepresentationMixin, models.Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-in_carts_count', '-pub_date'],
+                name='recipe_popularity_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'name', 'text', 'cooking_time'],
                 name='unique_recipe'
             ),
         ]
+
+
+class ShoppingCartExport(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Формируется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_exports'
+    )
+    status = models.CharField(
+        verbose_name='статус',
+        max_length=settings.MAX_LENGTH_EXPORT_STATUS,
+        choices=STATUSES,
+        default=PENDING
+    )
+    file = models.FileField(
+        verbose_name='файл',
+        upload_to='shopping_carts/',
+        blank=True
+    )
+    created = models.DateTimeField(
+        'дата создания',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Выгрузка списка покупок'
+        verbose_name_plural = 'Выгрузки списков покупок'
+        ordering = ('-created',)
+
+    def __str__(self) -> str:
+        return (
+            f'Выгрузка списка покупок пользователя '
+            f'{self.user.get_username()} ({self.status})'
+        )
+
+
+class CatalogueVersion(models.Model):
+    version = models.PositiveBigIntegerField(
+        verbose_name='версия',
+        default=0
+    )
+    updated_at = models.DateTimeField(
+        'дата изменения',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Версия каталога ингредиентов'
+        verbose_name_plural = 'Версии каталога ингредиентов'
+
+    def __str__(self) -> str:
+        return f'Версия каталога ингредиентов {self.version}'
+
+    @classmethod
+    def get_current(cls):
+        return cls.get_state()[0]
+
+    @classmethod
+    def get_state(cls):
+        return cls.objects.filter(pk=1).values_list(
+            'version', 'updated_at'
+        ).first() or (0, None)
+
+    @classmethod
+    def bump(cls):
+        '''Увеличивает версию одним запросом и создаёт строку версии,
+        если её ещё нет.'''
+        connection = connections[router.db_for_write(cls)]
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (id, version, updated_at) '
+                'VALUES (1, 1, %s) ON CONFLICT (id) DO UPDATE SET '
+                f'version = {table}.version + 1, '
+                'updated_at = excluded.updated_at',
+                [connection.ops.adapt_datetimefield_value(timezone.now())]
+            )
+
+
+class RecipeTrend(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend'
+    )
+    score = models.FloatField(verbose_name='рейтинг', default=0)
+
+    class Meta:
+        verbose_name = 'Рейтинг популярности рецепта'
+        verbose_name_plural = 'Рейтинги популярности рецептов'
+        ordering = ('-score',)
+        indexes = [
+            models.Index(fields=['-score'], name='recipe_trend_score_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.recipe.name}: {self.score:.2f}'
+
+
+class TrendingState(models.Model):
+    favorite_watermark = models.PositiveBigIntegerField(
+        verbose_name='последнее учтённое избранное',
+        default=0
+    )
+    purchase_watermark = models.PositiveBigIntegerField(
+        verbose_name='последняя учтённая покупка',
+        default=0
+    )
+    refreshed_at = models.DateTimeField(
+        verbose_name='дата пересчёта',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Состояние рейтинга популярности'
+        verbose_name_plural = 'Состояния рейтинга популярности'
+
+    def __str__(self) -> str:
+        return f'Рейтинг популярности на {self.refreshed_at}'
@@ -9,6 +9,11 @@ from recipes.models import (
 from users.models import Subscription
 
 
+@pytest.fixture(autouse=True)
+def run_background_tasks_inline(settings):
+    settings.BACKGROUND_WORKERS = 0
+
+
 @pytest.fixture()
 def mock_media(settings):
     with tempfile.TemporaryDirectory() as temp_directory:
@@ -116,3 +121,25 @@ def subscription_1(user, another_user):
         user=user,
         author=another_user
     )
+
+
+@pytest.fixture
+def recipes(user, tag_1, ingredient_1):
+    recipes = []
+    for index in range(5):
+        image = tempfile.NamedTemporaryFile(suffix=".jpg").name
+        recipe = Recipe.objects.create(
+            name=f'TestRecipeBatch{index}',
+            text=f'TextTestRecipeBatch{index}',
+            cooking_time=10,
+            author=user,
+            image=image
+        )
+        recipe.tags.set([tag_1])
+        IngredientRecipe.objects.create(
+            recipe=recipe,
+            ingredient=ingredient_1,
+            amount=index + 1
+        )
+        recipes.append(recipe)
+    return recipes
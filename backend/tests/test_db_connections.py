@@ -0,0 +1,117 @@
+import threading
+
+import psycopg2
+import pytest
+from django.db import connection
+from django.db.utils import OperationalError, ProgrammingError
+
+from core.db.postgresql.base import DatabaseWrapper
+
+
+@pytest.fixture
+def postgresql():
+    if connection.vendor != 'postgresql':
+        pytest.skip('Проверка соединений PostgreSQL')
+
+
+@pytest.fixture
+def pooled_settings(postgresql):
+    yield {
+        **connection.settings_dict,
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'pool': {'min_size': 1, 'max_size': 1, 'timeout': 1}},
+    }
+    DatabaseWrapper.close_pools()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDatabaseConnections:
+
+    def test_health_check_replaces_broken_connection(self, postgresql):
+        '''Проверка, что разорванное сервером постоянное соединение
+        заменяется новым перед первым запросом к БД'''
+        wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            'CONN_MAX_AGE': 60,
+            'CONN_HEALTH_CHECKS': True,
+        }, 'checked')
+        wrapper.ensure_connection()
+        backend_pid = wrapper.connection.get_backend_pid()
+        other_connection = psycopg2.connect(
+            **wrapper.get_connection_params()
+        )
+        try:
+            with other_connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT pg_terminate_backend(%s)', (backend_pid,)
+                )
+        finally:
+            other_connection.close()
+
+        # Так Django обрабатывает соединения в начале каждого запроса.
+        wrapper.close_if_unusable_or_obsolete()
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            assert wrapper.connection.get_backend_pid() != backend_pid, (
+                'Проверьте, что при CONN_HEALTH_CHECKS разорванное '
+                'соединение заменяется новым'
+            )
+        finally:
+            wrapper.close()
+
+    def test_connection_pool(self, pooled_settings):
+        '''Проверка, что соединения из пула переиспользуются, а при
+        исчерпании пула поток ждёт не дольше timeout'''
+        def connect_in_thread():
+            errors = []
+
+            def connect():
+                wrapper = DatabaseWrapper(pooled_settings, 'pooled')
+                try:
+                    wrapper.ensure_connection()
+                    backend_pids.append(wrapper.connection.get_backend_pid())
+                except OperationalError as error:
+                    errors.append(error)
+                finally:
+                    wrapper.close()
+
+            thread = threading.Thread(target=connect)
+            thread.start()
+            thread.join()
+            return errors
+
+        backend_pids = []
+        wrapper = DatabaseWrapper(pooled_settings, 'pooled')
+        wrapper.ensure_connection()
+        backend_pid = wrapper.connection.get_backend_pid()
+        assert connect_in_thread(), (
+            'Проверьте, что при занятом пуле соединение не открывается '
+            'сверх max_size'
+        )
+        wrapper.close()
+        assert not connect_in_thread()
+        assert backend_pids == [backend_pid], (
+            'Проверьте, что закрытое соединение возвращается в пул и '
+            'переиспользуется'
+        )
+
+    def test_pool_keeps_connection_after_caught_error(self, pooled_settings):
+        '''Проверка, что соединение возвращается в пул после ошибки,
+        перехваченной приложением'''
+        wrapper = DatabaseWrapper(pooled_settings, 'pooled')
+        wrapper.ensure_connection()
+        backend_pid = wrapper.connection.get_backend_pid()
+        with pytest.raises(ProgrammingError):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT * FROM missing_table')
+        wrapper.close()
+
+        wrapper.ensure_connection()
+        try:
+            assert wrapper.connection.get_backend_pid() == backend_pid, (
+                'Проверьте, что исправное соединение не закрывается '
+                'после перехваченной ошибки'
+            )
+        finally:
+            wrapper.close()
@@ -1,9 +1,11 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
 from django.urls import reverse
 
-from recipes.models import Favorite
+from recipes.models import Favorite, Recipe
 from tests.utils import check_fields_in_response
 
 
@@ -119,3 +121,53 @@ class TestFavoriteAPI:
             'Проверьте, что DELETE-запрос автора подписки к '
             f'`{favorite_url}` удаляет рецепт из избранного'
         )
+
+    def test_favorite_recipe_counters(
+            self, user_client, another_user_client, recipe_1
+    ):
+        '''Проверка счётчиков избранного и списка покупок у рецепта'''
+        favorite_url = reverse(
+            'favorites-list', kwargs={'recipe_id': recipe_1.id}
+        )
+        purchase_url = reverse(
+            'purchases-list', kwargs={'recipe_id': recipe_1.id}
+        )
+        user_client.post(favorite_url)
+        another_user_client.post(favorite_url)
+        user_client.post(favorite_url)
+        user_client.post(purchase_url)
+        recipe_1.refresh_from_db()
+        assert (recipe_1.favorites_count, recipe_1.in_carts_count) == (
+            2, 1
+        ), (
+            'Проверьте, что добавление рецепта в избранное и в список '
+            'покупок увеличивает счётчики рецепта только один раз'
+        )
+
+        another_user_client.delete(favorite_url)
+        user_client.delete(purchase_url)
+        recipe_1.refresh_from_db()
+        assert (recipe_1.favorites_count, recipe_1.in_carts_count) == (
+            1, 0
+        ), (
+            'Проверьте, что удаление рецепта из избранного и из списка '
+            'покупок уменьшает счётчики рецепта'
+        )
+
+    def test_reconcile_recipe_counters(self, favorite, recipe_1):
+        '''Проверка пересчёта счётчиков рецептов командой
+        reconcilecounters'''
+        Recipe.objects.filter(pk=recipe_1.id).update(
+            favorites_count=10, in_carts_count=3
+        )
+        stdout = StringIO()
+        call_command('reconcilecounters', stdout=stdout)
+
+        recipe_1.refresh_from_db()
+        assert (recipe_1.favorites_count, recipe_1.in_carts_count) == (
+            1, 0
+        ), (
+            'Проверьте, что команда reconcilecounters пересчитывает '
+            'счётчики избранного и списка покупок'
+        )
+        assert 'Исправлено рецептов: 1' in stdout.getvalue()
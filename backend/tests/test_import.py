@@ -0,0 +1,159 @@
+import json
+import tracemalloc
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from recipes.models import Ingredient, Unit
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImportIngredients:
+
+    import_memory_ceiling = 4 * 1024 * 1024
+
+    ingredients = [
+        {'name': 'мука', 'measurement_unit': 'г'},
+        {'name': 'молоко', 'measurement_unit': 'мл'},
+        {'name': 'сахар', 'measurement_unit': 'г'},
+        {'name': 'яйца', 'measurement_unit': 'шт.'},
+        {'name': 'мука', 'measurement_unit': 'г'},
+    ]
+
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        path = tmp_path / 'ingredients.csv'
+        path.write_text(
+            'name,measurement_unit\n' + ''.join(
+                f'{row["name"]},{row["measurement_unit"]}\n'
+                for row in self.ingredients
+            ),
+            encoding='utf-8'
+        )
+        return path
+
+    @pytest.fixture
+    def json_path(self, tmp_path):
+        path = tmp_path / 'ingredients.json'
+        path.write_text(
+            json.dumps(self.ingredients, ensure_ascii=False),
+            encoding='utf-8'
+        )
+        return path
+
+    @pytest.mark.parametrize('command', ('importcsv', 'importjson'))
+    def test_import_ingredients(
+            self, command, csv_path, json_path, django_assert_max_num_queries
+    ):
+        '''Проверка импорта ингредиентов пачками с повторным запуском'''
+        path = csv_path if command == 'importcsv' else json_path
+        stdout = StringIO()
+        with django_assert_max_num_queries(10):
+            call_command(
+                command, path=str(path), batch_size=2, stdout=stdout
+            )
+        call_command(command, path=str(path), stdout=StringIO())
+
+        assert Ingredient.objects.count() == 4, (
+            f'Проверьте, что команда {command} импортирует ингредиенты '
+            'без дубликатов, в том числе при повторном запуске'
+        )
+        assert sorted(Unit.objects.values_list('name', flat=True)) == [
+            'г', 'мл', 'шт.'
+        ], (
+            f'Проверьте, что команда {command} создаёт каждую единицу '
+            'измерения один раз'
+        )
+        assert 'строк/с' in stdout.getvalue(), (
+            f'Проверьте, что команда {command} выводит скорость импорта'
+        )
+
+    def test_import_dry_run(self, csv_path):
+        '''Проверка, что --dry-run не сохраняет данные'''
+        call_command(
+            'importcsv', path=str(csv_path), dry_run=True, stdout=StringIO()
+        )
+
+        assert not Ingredient.objects.exists() and not Unit.objects.exists(), (
+            'Проверьте, что команда importcsv с --dry-run не сохраняет '
+            'ингредиенты и единицы измерения'
+        )
+
+    @pytest.mark.parametrize('dry_run', (True, False))
+    def test_import_invalid_row(self, tmp_path, dry_run):
+        '''Проверка отката импорта при некорректной строке'''
+        path = tmp_path / 'ingredients.json'
+        path.write_text(json.dumps(
+            [{'name': 'мука', 'measurement_unit': 'г'}, {'name': 'соль'}]
+        ))
+
+        with pytest.raises(CommandError, match='Строка 2'):
+            call_command(
+                'importjson', path=str(path), batch_size=1, dry_run=dry_run,
+                stdout=StringIO()
+            )
+        assert not Ingredient.objects.exists(), (
+            'Проверьте, что при ошибке в файле импорт не сохраняет '
+            'ингредиенты'
+        )
+
+    def test_import_malformed_json(self, tmp_path, settings):
+        '''Проверка сообщения о некорректной записи JSON с её
+        позицией в файле'''
+        settings.IMPORT_JSON_MAX_RECORD_SIZE = 64
+        path = tmp_path / 'ingredients.json'
+        path.write_text(
+            '{"name": "мука", "measurement_unit": "г"}\n'
+            '{"name": соль, "measurement_unit": "г"}\n' + ''.join(
+                json.dumps(row, ensure_ascii=False) + '\n'
+                for row in self.ingredients
+            ),
+            encoding='utf-8'
+        )
+
+        with pytest.raises(
+            CommandError, match='Некорректный JSON в строке 2, символ 52'
+        ):
+            call_command('importjson', path=str(path), stdout=StringIO())
+        assert not Ingredient.objects.exists(), (
+            'Проверьте, что при некорректном JSON импорт не сохраняет '
+            'ингредиенты'
+        )
+
+    @pytest.mark.parametrize('json_lines', (False, True))
+    def test_import_large_json_memory(self, tmp_path, json_lines):
+        '''Проверка, что потребление памяти при импорте JSON не растёт
+        вместе с размером файла'''
+        rows_amount = 20000
+        path = tmp_path / 'ingredients.json'
+        with open(path, 'w', encoding='utf-8') as json_file:
+            json_file.write('' if json_lines else '[')
+            for index in range(rows_amount):
+                if index and not json_lines:
+                    json_file.write(',')
+                json.dump(
+                    {
+                        'name': f'ингредиент {index}',
+                        'measurement_unit': f'единица {index % 10}',
+                    },
+                    json_file,
+                    ensure_ascii=False
+                )
+                json_file.write('\n' if json_lines else '')
+            json_file.write('' if json_lines else ']')
+
+        tracemalloc.start()
+        call_command('importjson', path=str(path), stdout=StringIO())
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert Ingredient.objects.count() == rows_amount, (
+            'Проверьте, что команда importjson импортирует все ингредиенты '
+            'из большого файла'
+        )
+        assert peak_memory < self.import_memory_ceiling, (
+            'Проверьте, что команда importjson читает файл частями и '
+            'не загружает его в память целиком'
+        )
@@ -3,6 +3,8 @@ from http import HTTPStatus
 import pytest
 from django.urls import reverse
 
+from recipes.models import CatalogueVersion, Ingredient
+
 from tests.utils import (check_fields_in_response,
                          check_only_safe_methods_allowed)
 
@@ -124,3 +126,121 @@ class TestIngredeintsAPI:
             f'ингредиента для эндпоинта {self.ingredients_list_url} '
             'работает корректно'
         )
+
+    def test_ingredient_autocomplete_prefix_first(
+        self,
+        client,
+        unit,
+        settings
+    ):
+        '''Проверка, что ингредиенты, начинающиеся с запроса, идут раньше
+        ингредиентов, содержащих запрос, и количество результатов ограничено
+        '''
+        settings.INGREDIENT_AUTOCOMPLETE_LIMIT = 3
+        for name in (
+            'сметана', 'творог', 'сахар', 'масло сливочное', 'Сливки',
+            'соль'
+        ):
+            Ingredient.objects.create(name=name, measurement_unit=unit)
+
+        response_json = client.get(
+            self.ingredients_list_url, {'name': 'сли'}
+        ).json()
+        assert [
+            ingredient['name'] for ingredient in response_json
+        ] == ['Сливки', 'масло сливочное'], (
+            'Проверьте, что при поиске по названию для эндпоинта '
+            f'{self.ingredients_list_url} ингредиенты, начинающиеся с '
+            'запроса, возвращаются раньше содержащих его'
+        )
+
+        response_json = client.get(
+            self.ingredients_list_url, {'name': 'с'}
+        ).json()
+        assert [
+            ingredient['name'] for ingredient in response_json
+        ] == ['сахар', 'Сливки', 'сметана'], (
+            'Проверьте, что количество результатов поиска по названию для '
+            f'эндпоинта {self.ingredients_list_url} ограничено'
+        )
+
+    def test_ingredient_catalogue_cache_invalidation(
+        self,
+        client,
+        admin_user_client,
+        user_client,
+        ingredient_1
+    ):
+        '''Проверка, что каталог ингредиентов в памяти обновляется после
+        изменения версии каталога и считает попадания в кэш'''
+        client.get(self.ingredients_list_url)
+        client.get(self.ingredients_list_url)
+
+        Ingredient.objects.bulk_create([
+            Ingredient(
+                name='IngredientName3',
+                measurement_unit=ingredient_1.measurement_unit
+            )
+        ])
+        response_json = client.get(self.ingredients_list_url).json()
+        assert len(response_json) == 1, (
+            'Проверьте, что каталог ингредиентов берётся из кэша, пока '
+            'не изменилась его версия'
+        )
+
+        CatalogueVersion.bump()
+        response_json = client.get(self.ingredients_list_url).json()
+        assert len(response_json) == 2, (
+            'Проверьте, что каталог ингредиентов перечитывается после '
+            'изменения его версии'
+        )
+
+        stats_url = reverse('ingredients-cache-stats')
+        assert user_client.get(stats_url).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), (
+            f'Проверьте, что {stats_url} доступен только администратору'
+        )
+        stats = admin_user_client.get(stats_url).json()
+        assert stats['hits'] >= 2 and stats['misses'] >= 2, (
+            f'Проверьте, что {stats_url} возвращает число попаданий '
+            'и промахов кэша каталога ингредиентов'
+        )
+
+    def test_ingredients_list_not_modified(
+        self,
+        client,
+        ingredient_1,
+        django_assert_max_num_queries
+    ):
+        '''Проверка условного GET-запроса к списку ингредиентов по ETag'''
+        response = client.get(self.ingredients_list_url)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+
+        with django_assert_max_num_queries(1):
+            response = client.get(
+                self.ingredients_list_url, HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к {self.ingredients_list_url} с '
+            'актуальным If-None-Match возвращает код 304'
+        )
+        response = client.get(
+            self.ingredients_list_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к {self.ingredients_list_url} с '
+            'актуальным If-Modified-Since возвращает код 304'
+        )
+
+        ingredient_1.name = 'IngredientNameChanged'
+        ingredient_1.save()
+        response = client.get(
+            self.ingredients_list_url, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что ETag списка ингредиентов '
+            f'{self.ingredients_list_url} меняется после изменения '
+            'ингредиента'
+        )
@@ -0,0 +1,105 @@
+import json
+import logging
+import re
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from rest_framework.serializers import BaseSerializer
+
+from core.metrics import request_metrics
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", '
+    r'serializer;dur=[\d.]+, total;dur=[\d.]+'
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestQueryMetrics:
+
+    metrics_url = reverse('metrics-list')
+
+    @pytest.fixture(autouse=True)
+    def enable_metrics(self, settings):
+        settings.REQUEST_METRICS_ENABLED = True
+        request_metrics.clear()
+        yield
+        request_metrics.clear()
+
+    def test_server_timing_and_log(
+            self, user_client, recipes, tag_1, caplog,
+            django_assert_num_queries, mock_media
+    ):
+        '''Проверка заголовка Server-Timing и структурированного лога
+        с количеством запросов к БД'''
+        url = reverse('recipes-list') + f'?tags={tag_1.slug}'
+        with caplog.at_level(logging.INFO, logger='core.middleware'):
+            response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        match = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        assert match, (
+            'Проверьте, что при REQUEST_METRICS_ENABLED ответ содержит '
+            'заголовок Server-Timing с временем SQL, сериализации и ответа'
+        )
+        log = json.loads(caplog.records[-1].getMessage())
+        assert log['endpoint'] == 'RecipeViewSet.list'
+        assert log['queries'] == int(match.group(1)) > 0
+        assert log['serializer_ms'] > 0, (
+            'Проверьте, что в метриках учитывается время сериализации'
+        )
+        assert log['response_size'] == len(response.content)
+
+    def test_serializers_restored(self, user_client, tag_1):
+        '''Проверка, что замер времени сериализации действует только
+        во время запроса'''
+        data = BaseSerializer.data
+        response = user_client.get(reverse('tags-list'))
+        assert SERVER_TIMING.fullmatch(response['Server-Timing'])
+        assert BaseSerializer.data is data, (
+            'Проверьте, что после запроса BaseSerializer.data '
+            'возвращается к исходному свойству'
+        )
+
+    def test_streaming_response_metrics(
+            self, user_client, purchase, ingredientrecipe_1, caplog,
+            mock_media
+    ):
+        '''Проверка учёта запросов, выполняемых при отдаче потокового
+        ответа'''
+        url = reverse('recipes-download-shopping-cart') + '?format=csv'
+        with caplog.at_level(logging.INFO, logger='core.middleware'):
+            response = user_client.get(url)
+            content = b''.join(response.streaming_content)
+        log = json.loads(caplog.records[-1].getMessage())
+        assert log['endpoint'] == 'RecipeViewSet.download_shopping_cart'
+        assert log['response_size'] == len(content)
+        assert log['queries'] > 0
+
+    def test_metrics_endpoint(
+            self, user_client, admin_user_client, tag_1
+    ):
+        '''Проверка выгрузки гистограмм по эндпоинтам только для
+        администратора'''
+        for _ in range(3):
+            user_client.get(reverse('tags-list'))
+        response = user_client.get(self.metrics_url)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что метрики недоступны обычному пользователю'
+        )
+
+        stats = admin_user_client.get(self.metrics_url).json()
+        tags_stats = stats['TagViewSet.list']
+        assert tags_stats['requests'] == 3
+        assert sum(tags_stats['total_ms_histogram'].values()) == 3, (
+            'Проверьте, что гистограмма времени ответа учитывает '
+            'все запросы к эндпоинту'
+        )
+
+    def test_metrics_disabled(self, settings, client, tag_1):
+        '''Проверка, что при выключенных метриках middleware
+        не участвует в обработке запросов'''
+        settings.REQUEST_METRICS_ENABLED = False
+        response = client.get(reverse('tags-list'))
+        assert 'Server-Timing' not in response
+        assert request_metrics.get_stats() == {}
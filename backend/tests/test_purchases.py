@@ -1,9 +1,17 @@
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils import timezone
 
-from recipes.models import Purchase
+from core import pdf, tasks
+from recipes.models import Purchase, ShoppingCartExport
 from tests.utils import check_fields_in_response
 
 
@@ -165,3 +173,217 @@ class TestPurchaseAPI:
             'Проверьте, что GET-запрос авторизованного пользователя к'
             f'`{download_url}` при пустой корзине возвращает код 400'
         )
+
+    def test_download_shopping_cart_formats(
+            self, user_client, purchase, user, ingredientrecipe_1,
+            ingredient_1
+    ):
+        '''Проверка выгрузки списка покупок в форматах csv, txt и json'''
+        download_url = reverse('recipes-download-shopping-cart')
+        content_types = {
+            'csv': 'text/csv; charset=utf-8',
+            'txt': 'text/plain; charset=utf-8',
+            'json': 'application/json',
+        }
+        for format, content_type in content_types.items():
+            response = user_client.get(download_url + f'?format={format}')
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что GET-запрос авторизованного пользователя к '
+                f'`{download_url}?format={format}` возвращает код 200'
+            )
+            assert response.headers['Content-Type'] == content_type, (
+                'Проверьте, что GET-запрос авторизованного пользователя к '
+                f'`{download_url}?format={format}` возвращает файл '
+                f'в формате {format}'
+            )
+            content = b''.join(response.streaming_content).decode()
+            assert ingredient_1.name in content
+            assert str(ingredientrecipe_1.amount) in content
+
+        response = user_client.get(download_url + '?format=json')
+        assert json.loads(b''.join(response.streaming_content)) == [{
+            'name': ingredient_1.name,
+            'amount': ingredientrecipe_1.amount,
+            'measurement_unit': ingredient_1.measurement_unit.name,
+        }]
+
+    def test_download_empty_shopping_cart_formats(self, user_client):
+        '''Проверка, что ошибка при выгрузке пустого списка покупок
+        возвращается в формате JSON'''
+        download_url = reverse('recipes-download-shopping-cart')
+        for format in ('pdf', 'csv', 'txt', 'json'):
+            response = user_client.get(download_url + f'?format={format}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+            assert response.headers['Content-Type'] == 'application/json'
+            assert 'details' in response.json()
+
+    def test_pdf_resource_recreated(self, settings, tmp_path, monkeypatch):
+        '''Проверка, что удалённое из временного каталога уменьшенное
+        изображение для PDF готовится заново'''
+        monkeypatch.setattr(pdf, 'PDF_RESOURCES_DIR', str(tmp_path))
+        pdf.prepare_pdf_resource.cache_clear()
+        settings.PDF_IMAGE_MAX_SIZE = (10, 10)
+        path = os.path.join(settings.STATIC_ROOT, 'img', 'logo.png')
+
+        prepared_path = pdf.get_pdf_resource(path)
+        assert prepared_path != path
+        os.remove(prepared_path)
+        assert os.path.exists(pdf.get_pdf_resource(path)), (
+            'Проверьте, что get_pdf_resource не возвращает удалённый файл'
+        )
+        pdf.prepare_pdf_resource.cache_clear()
+
+    def test_download_shopping_cart_pdf_cache(
+            self, user_client, purchase, user, recipe_2,
+            ingredientrecipe_1, ingredient_2, settings, monkeypatch,
+            django_assert_max_num_queries
+    ):
+        '''Проверка, что повторная выгрузка неизменённого списка покупок
+        в PDF берётся из кэша, а изменение списка сбрасывает кэш'''
+        settings.CACHES = {
+            **settings.CACHES,
+            settings.SHOPPING_CART_CACHE: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+        }
+        from api import utils
+        rendered = []
+        render_to_pdf = utils.render_to_pdf
+
+        def counting_render_to_pdf(*args):
+            rendered.append(args)
+            return render_to_pdf(*args)
+
+        monkeypatch.setattr(
+            utils, 'render_to_pdf', counting_render_to_pdf
+        )
+        download_url = reverse('recipes-download-shopping-cart')
+
+        first_response = user_client.get(download_url)
+        with django_assert_max_num_queries(2):
+            second_response = user_client.get(download_url)
+        assert len(rendered) == 1, (
+            'Проверьте, что повторная выгрузка неизменённого списка '
+            'покупок не формирует PDF заново'
+        )
+        assert first_response.content == second_response.content
+
+        recipe_2.ingredients.create(ingredient=ingredient_2, amount=5)
+        Purchase.objects.create(user=user, recipe=recipe_2)
+        user_client.get(download_url)
+        assert len(rendered) == 2, (
+            'Проверьте, что изменение списка покупок сбрасывает кэш PDF'
+        )
+
+    def test_shopping_cart_export_job(
+            self, user_client, another_user_client, client, purchase,
+            ingredientrecipe_1, settings, mock_media
+    ):
+        '''Проверка создания задачи на формирование списка покупок
+        и получения её статуса'''
+        settings.BACKGROUND_WORKERS = 0
+        jobs_url = reverse('shopping-cart-jobs-list')
+
+        assert client.post(jobs_url).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что POST-запрос неавторизованного пользователя к '
+            f'`{jobs_url}` возвращает код 401'
+        )
+
+        response = user_client.post(jobs_url)
+        assert response.status_code == HTTPStatus.ACCEPTED, (
+            'Проверьте, что POST-запрос авторизованного пользователя к '
+            f'`{jobs_url}` возвращает код 202'
+        )
+        job = response.json()
+        job_url = reverse(
+            'shopping-cart-jobs-detail', kwargs={'pk': job['id']}
+        )
+
+        response = user_client.get(job_url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['status'] == ShoppingCartExport.DONE, (
+            f'Проверьте, что GET-запрос к `{job_url}` возвращает '
+            'статус задачи'
+        )
+        assert response.json()['file'].endswith('.pdf')
+        export = ShoppingCartExport.objects.get(id=job['id'])
+        with export.file.open('rb') as pdf:
+            content = pdf.read()
+        assert content.startswith(b'%PDF')
+        assert b'Zlusa' in content, (
+            'Проверьте, что шрифт подключается в PDF через @font-face'
+        )
+
+        assert another_user_client.get(job_url).status_code == (
+            HTTPStatus.NOT_FOUND
+        ), (
+            'Проверьте, что пользователь не может получить '
+            'чужую задачу выгрузки списка покупок'
+        )
+
+    def test_shopping_cart_export_job_empty_cart(self, user_client, settings):
+        '''Проверка создания задачи при пустом списке покупок'''
+        settings.BACKGROUND_WORKERS = 0
+        response = user_client.post(reverse('shopping-cart-jobs-list'))
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert not ShoppingCartExport.objects.exists()
+
+    def test_cleanup_exports(self, user, settings, mock_media):
+        '''Проверка, что cleanupexports отмечает зависшие задачи
+        ошибочными и удаляет устаревшие выгрузки вместе с файлами'''
+        stale = ShoppingCartExport.objects.create(user=user)
+        running = ShoppingCartExport.objects.create(
+            user=user, status=ShoppingCartExport.RUNNING
+        )
+        expired = ShoppingCartExport.objects.create(
+            user=user, status=ShoppingCartExport.DONE
+        )
+        expired.file.save('expired.pdf', ContentFile(b'%PDF'))
+        now = timezone.now()
+        ShoppingCartExport.objects.filter(id=stale.id).update(
+            created=now - settings.SHOPPING_CART_EXPORT_TIMEOUT * 2
+        )
+        ShoppingCartExport.objects.filter(id=expired.id).update(
+            created=now - settings.SHOPPING_CART_EXPORT_TTL * 2
+        )
+
+        call_command('cleanupexports', stdout=StringIO())
+        stale.refresh_from_db()
+        running.refresh_from_db()
+        assert stale.status == ShoppingCartExport.FAILED, (
+            'Проверьте, что cleanupexports отмечает ошибочными задачи, '
+            'не завершившиеся за SHOPPING_CART_EXPORT_TIMEOUT'
+        )
+        assert running.status == ShoppingCartExport.RUNNING
+        assert not ShoppingCartExport.objects.filter(id=expired.id).exists()
+        assert not os.path.exists(expired.file.path), (
+            'Проверьте, что файлы PDF удаляются вместе с выгрузками'
+        )
+
+    def test_background_executor_recovers(self, settings, monkeypatch):
+        '''Проверка, что после аварийного завершения рабочего процесса
+        задачи отправляются в новый пул'''
+        class Executor:
+            broken = True
+
+            def __init__(self, **kwargs):
+                self.broken = Executor.broken
+                Executor.broken = False
+
+            def submit(self, func, *args):
+                if self.broken:
+                    raise BrokenProcessPool
+                return func(*args)
+
+            def shutdown(self, wait):
+                pass
+
+        settings.BACKGROUND_WORKERS = 1
+        monkeypatch.setattr(tasks, 'ProcessPoolExecutor', Executor)
+        monkeypatch.setattr(tasks, '_executor', None)
+        assert tasks.run_in_background(sum, (1, 2)) == 3, (
+            'Проверьте, что run_in_background пересоздаёт пул процессов '
+            'после BrokenProcessPool'
+        )
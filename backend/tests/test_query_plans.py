@@ -0,0 +1,203 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from recipes.models import (
+    Favorite, Ingredient, IngredientRecipe, Purchase, Recipe, Tag, Unit
+)
+from users.models import Subscription, User
+
+SEED_USERS_AMOUNT = 50
+SEED_RECIPES_PER_USER = 40
+SEED_INGREDIENTS_AMOUNT = 100
+SEED_INGREDIENTS_PER_RECIPE = 5
+SEED_USER_RELATIONS_AMOUNT = 20
+LARGE_TABLES = (
+    Recipe._meta.db_table,
+    Recipe.tags.through._meta.db_table,
+    IngredientRecipe._meta.db_table,
+    Favorite._meta.db_table,
+    Purchase._meta.db_table,
+    Subscription._meta.db_table,
+)
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+POSTGRESQL_FULL_SCAN = re.compile(r'\bSeq Scan on (\w+)')
+
+
+def get_full_scans(sql):
+    '''Возвращает таблицы, которые план запроса читает целиком.
+
+    На тестовом объёме данных PostgreSQL дешевле прочитать таблицу
+    целиком, чем идти по индексу, поэтому последовательное чтение
+    запрещается: Seq Scan в плане остаётся, только если подходящего
+    индекса нет.
+    '''
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            pattern = POSTGRESQL_FULL_SCAN
+        else:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            pattern = SQLITE_FULL_SCAN
+        plan = [str(row[-1]) for row in cursor.fetchall()]
+    return {
+        match.group(1)
+        for line in plan
+        if (match := pattern.search(line.strip()))
+    } & set(LARGE_TABLES), plan
+
+
+@pytest.fixture
+def seeded_data(user):
+    unit = Unit.objects.create(name='г')
+    Tag.objects.bulk_create(
+        Tag(name=f'SeedTag{index}', slug=f'seed-tag-{index}',
+            color=f'#0000{index:02d}')
+        for index in range(3)
+    )
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'SeedIngredient{index}', measurement_unit=unit)
+        for index in range(SEED_INGREDIENTS_AMOUNT)
+    )
+    User.objects.bulk_create(
+        User(
+            username=f'SeedUser{index}',
+            email=f'seed_user{index}@mail.ru',
+            first_name='SeedFirstName',
+            last_name='SeedLastName',
+        )
+        for index in range(SEED_USERS_AMOUNT - 1)
+    )
+    tags = list(Tag.objects.order_by('id'))
+    ingredients = list(Ingredient.objects.order_by('id'))
+    authors = list(User.objects.order_by('id'))
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author,
+            name=f'SeedRecipe{author.id}-{index}',
+            text='SeedText',
+            cooking_time=index + 1,
+            image='recipe/images/seed.jpg',
+        )
+        for author in authors
+        for index in range(SEED_RECIPES_PER_USER)
+    )
+    recipes = list(Recipe.objects.order_by('id'))
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tags[recipe.id % len(tags)])
+        for recipe in recipes
+    )
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(
+            recipe=recipe,
+            ingredient=ingredients[(recipe.id + index) % len(ingredients)],
+            amount=index + 1,
+        )
+        for recipe in recipes
+        for index in range(SEED_INGREDIENTS_PER_RECIPE)
+    )
+    for model in (Favorite, Purchase):
+        model.objects.bulk_create(
+            model(user=author, recipe=recipes[
+                (author.id * 7 + index * 13) % len(recipes)
+            ])
+            for author in authors
+            for index in range(SEED_USER_RELATIONS_AMOUNT)
+        )
+    Subscription.objects.bulk_create(
+        Subscription(user=author, author=authors[
+            (position + index + 1) % len(authors)
+        ])
+        for position, author in enumerate(authors)
+        for index in range(SEED_USER_RELATIONS_AMOUNT)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return tags
+
+
+@pytest.mark.django_db(transaction=True)
+class TestQueryPlans:
+
+    def assert_no_full_scans(
+            self, client, url, description, expected_indexes=()
+    ):
+        used_indexes = set()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        assert response.status_code == HTTPStatus.OK
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            full_scans, plan = get_full_scans(query['sql'])
+            assert not full_scans, (
+                f'Проверьте, что запрос {description} не читает таблицы '
+                f'{", ".join(sorted(full_scans))} целиком: '
+                f'{query["sql"]}\n' + '\n'.join(plan)
+            )
+            used_indexes.update(
+                index for index in expected_indexes
+                if any(index in line for line in plan)
+            )
+        assert used_indexes == set(expected_indexes), (
+            f'Проверьте, что запросы {description} используют индексы '
+            f'{", ".join(sorted(set(expected_indexes) - used_indexes))}'
+        )
+
+    def test_recipe_feed_plan(self, user_client, seeded_data):
+        '''Проверка, что лента рецептов использует индексы'''
+        self.assert_no_full_scans(
+            user_client,
+            reverse('recipes-list') + f'?tags={seeded_data[0].slug}&cursor=',
+            'ленты рецептов',
+            ('recipe_pub_date_id_idx', 'ingredient_recipe_covering_idx')
+        )
+
+    def test_author_recipes_plan(self, user_client, user, seeded_data):
+        '''Проверка, что рецепты автора выбираются по индексу'''
+        self.assert_no_full_scans(
+            user_client,
+            reverse('recipes-list')
+            + f'?tags={seeded_data[0].slug}&author={user.id}&cursor=',
+            'рецептов автора',
+            ('recipe_author_pub_date_id_idx',)
+        )
+
+    def test_favorites_filter_plan(self, user_client, seeded_data):
+        '''Проверка, что фильтр избранного использует индексы'''
+        self.assert_no_full_scans(
+            user_client,
+            reverse('recipes-list')
+            + f'?tags={seeded_data[0].slug}&is_favorited=1&cursor=',
+            'избранных рецептов'
+        )
+
+    def test_shopping_cart_plan(self, user_client, seeded_data):
+        '''Проверка, что фильтр и выгрузка списка покупок
+        используют индексы'''
+        self.assert_no_full_scans(
+            user_client,
+            reverse('recipes-list')
+            + f'?tags={seeded_data[0].slug}&is_in_shopping_cart=1&cursor=',
+            'рецептов из списка покупок'
+        )
+        self.assert_no_full_scans(
+            user_client,
+            reverse('recipes-download-shopping-cart') + '?format=csv',
+            'выгрузки списка покупок',
+            ('ingredient_recipe_covering_idx',)
+        )
+
+    def test_subscriptions_plan(self, user_client, seeded_data):
+        '''Проверка, что список подписок с рецептами авторов
+        использует индексы'''
+        subscriptions_url = reverse('users-subscriptions')
+        for url in (subscriptions_url, subscriptions_url + '?recipes_limit=3'):
+            self.assert_no_full_scans(user_client, url, 'подписок')
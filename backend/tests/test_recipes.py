@@ -1,10 +1,29 @@
+import base64
+import hashlib
 import json
+import os
+import time
+import tracemalloc
+from datetime import timedelta
 from http import HTTPStatus
+from io import BytesIO, StringIO
 
 import pytest
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-
-from recipes.models import IngredientRecipe, Recipe, Tag
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import ExifTags, Image
+
+from api.fields import Base64ImageField
+from api.tasks import process_recipe_image
+from recipes.models import (
+    Favorite, Ingredient, IngredientRecipe, Purchase, Recipe, Tag
+)
 from tests.utils import check_fields_in_response
 
 
@@ -143,6 +162,49 @@ class TestRecipesAPI:
         }
         check_fields_in_response(tag_fields, tag, self.recipes_url)
 
+    def test_recipe_list_user_flags_query_count(
+            self, user_client, user, recipes, tag_1, mock_media
+    ):
+        '''Проверка, что флаги is_favorited и is_in_shopping_cart
+        вычисляются без отдельных запросов на каждый рецепт'''
+        Favorite.objects.create(user=user, recipe=recipes[0])
+        Purchase.objects.create(user=user, recipe=recipes[1])
+
+        flag_queries = {}
+        for limit in (1, len(recipes)):
+            with CaptureQueriesContext(connection) as context:
+                response = user_client.get(
+                    self.recipes_url + f'?tags={tag_1.slug}&limit={limit}'
+                )
+            flag_queries[limit] = [
+                query['sql'] for query in context.captured_queries
+                if 'recipes_favorite' in query['sql']
+                or 'recipes_purchase' in query['sql']
+            ]
+
+        assert len(flag_queries[1]) == len(flag_queries[len(recipes)]), (
+            f'Проверьте, что при GET-запросе к `{self.recipes_url}` '
+            'количество запросов к избранному и списку покупок '
+            'не зависит от размера страницы'
+        )
+
+        results = {
+            recipe['id']: recipe for recipe in response.json()['results']
+        }
+        for recipe in recipes:
+            assert results[recipe.id]['is_favorited'] == (
+                recipe == recipes[0]
+            ), (
+                f'Проверьте, что в ответ на GET-запрос к `{self.recipes_url}` '
+                'поле is_favorited отображается корректно'
+            )
+            assert results[recipe.id]['is_in_shopping_cart'] == (
+                recipe == recipes[1]
+            ), (
+                f'Проверьте, что в ответ на GET-запрос к `{self.recipes_url}` '
+                'поле is_in_shopping_cart отображается корректно'
+            )
+
     def test_acces_not_authenticated_recipes_detail(self, client, recipe_1):
         '''
         Проверка существования эндпоинта recipes/{pk} и наличия доступа к нему
@@ -755,3 +817,668 @@ class TestRecipesAPI:
             'от пользователя, не являющегося автором рецепта'
             'не изменяет его'
         )
+
+    def test_recipe_list_filter_by_several_tags(
+            self, client, recipe_1, recipe_2, tag_1, tag_2,
+            django_assert_max_num_queries, mock_media
+    ):
+        '''Проверка, что фильтрация по нескольким тегам не дублирует
+        рецепты и не использует JOIN с DISTINCT'''
+        url = self.recipes_url + f'?tags={tag_1.slug}&tags={tag_2.slug}'
+        with django_assert_max_num_queries(5) as context:
+            response_json = client.get(url).json()
+
+        recipe_ids = [recipe['id'] for recipe in response_json['results']]
+        assert sorted(recipe_ids) == sorted((recipe_1.id, recipe_2.id)), (
+            'Проверьте, что фильтрация по нескольким тегам возвращает '
+            'каждый подходящий рецепт ровно один раз'
+        )
+        assert response_json['count'] == 2, (
+            'Проверьте, что при фильтрации по нескольким тегам количество '
+            'рецептов считается без дубликатов'
+        )
+        assert not any(
+            'DISTINCT' in query['sql'] for query in context.captured_queries
+        ), (
+            'Проверьте, что фильтрация по тегам выполняется подзапросом '
+            'EXISTS, а не JOIN с DISTINCT'
+        )
+
+    def test_recipe_list_ordering_by_popularity(
+            self, user_client, recipes, tag_1, mock_media
+    ):
+        '''Проверка сортировки списка рецептов по популярности'''
+        for recipe, favorites_count, in_carts_count in (
+            (recipes[0], 1, 5), (recipes[3], 7, 0), (recipes[1], 1, 6)
+        ):
+            Recipe.objects.filter(pk=recipe.id).update(
+                favorites_count=favorites_count,
+                in_carts_count=in_carts_count
+            )
+        response_json = user_client.get(
+            self.recipes_url, {'tags': tag_1.slug, 'ordering': '-popularity'}
+        ).json()
+
+        assert [
+            recipe['id'] for recipe in response_json['results'][:3]
+        ] == [recipes[3].id, recipes[1].id, recipes[0].id], (
+            'Проверьте, что ?ordering=-popularity сортирует рецепты по '
+            'количеству добавлений в избранное и в список покупок'
+        )
+
+        response = user_client.get(
+            self.recipes_url,
+            {'tags': tag_1.slug, 'ordering': '-popularity', 'cursor': ''}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что пагинация по курсору недоступна при сортировке '
+            'по популярности'
+        )
+
+    def test_recipe_counters_read_only(
+            self, user_client, ingredient_1, tag_1, mock_media
+    ):
+        '''Проверка, что счётчики избранного и списка покупок нельзя
+        изменить через API'''
+        data = {
+            'ingredients': [{'id': ingredient_1.id, 'amount': 10}],
+            'tags': [tag_1.id],
+            'image': self.base_64_image,
+            'name': 'CountersRecipe',
+            'text': 'string',
+            'cooking_time': 1,
+            'favorites_count': 999999,
+            'in_carts_count': 999999,
+        }
+        response = user_client.post(
+            self.recipes_url, json.dumps(data),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        recipe = Recipe.objects.get(id=response.json()['id'])
+        assert (recipe.favorites_count, recipe.in_carts_count) == (0, 0), (
+            'Проверьте, что счётчики рецепта из запроса на создание '
+            'игнорируются'
+        )
+        assert 'updated_at' not in response.json(), (
+            'Проверьте, что служебное поле updated_at не попадает в ответ'
+        )
+        response = user_client.patch(
+            reverse('recipes-detail', kwargs={'pk': recipe.id}),
+            json.dumps({'favorites_count': 7, 'in_carts_count': 7}),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        recipe.refresh_from_db()
+        assert (recipe.favorites_count, recipe.in_carts_count) == (0, 0), (
+            'Проверьте, что счётчики рецепта из запроса на изменение '
+            'игнорируются'
+        )
+
+    def test_recipe_image_variants(
+            self, user_client, ingredient_1, tag_1, mock_media, settings
+    ):
+        '''Проверка обработки картинки рецепта: варианты разных размеров
+        в WebP и JPEG без метаданных EXIF'''
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = 6
+        exif[ExifTags.Base.Model] = 'TestCamera'
+        buffer = BytesIO()
+        Image.new('RGB', (2400, 1200), 'red').save(
+            buffer, 'JPEG', exif=exif
+        )
+        data = {
+            'ingredients': [{'id': ingredient_1.id, 'amount': 10}],
+            'tags': [tag_1.id],
+            'image': 'data:image/jpeg;base64,' + base64.b64encode(
+                buffer.getvalue()
+            ).decode(),
+            'name': 'ImageRecipe',
+            'text': 'string',
+            'cooking_time': 1
+        }
+        response = user_client.post(
+            self.recipes_url, json.dumps(data),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response_json = response.json()
+        images = response_json['images']
+        assert images is not None and set(images) == set(
+            settings.RECIPE_IMAGE_VARIANTS
+        ), (
+            'Проверьте, что ответ содержит URL всех вариантов картинки'
+        )
+        recipe = Recipe.objects.get(id=response_json['id'])
+        assert recipe.image.name == recipe.image_variants['full']['jpeg'], (
+            'Проверьте, что исходная картинка заменяется вариантом full'
+        )
+        digest = hashlib.sha256(buffer.getvalue()).hexdigest()
+        original_path = os.path.join(
+            mock_media, 'recipe', 'images', digest[:2], digest + '.jpeg'
+        )
+        assert not os.path.exists(original_path), (
+            'Проверьте, что исходный файл с метаданными удаляется '
+            'после обработки картинки'
+        )
+        for variant, (max_width, max_height) in (
+            settings.RECIPE_IMAGE_VARIANTS.items()
+        ):
+            assert set(images[variant]) == {'webp', 'jpeg'}
+            for extension, name in recipe.image_variants[variant].items():
+                assert images[variant][extension].endswith(name)
+                with Image.open(os.path.join(mock_media, name)) as image:
+                    assert image.format == extension.upper()
+                    assert not image.getexif(), (
+                        'Проверьте, что метаданные EXIF удаляются'
+                    )
+                    assert image.height > image.width, (
+                        'Проверьте, что ориентация из EXIF применяется '
+                        'к изображению'
+                    )
+                    assert image.width <= max_width
+                    assert image.height <= max_height
+
+        response = user_client.get(
+            self.recipes_url + f'?tags={tag_1.slug}'
+        )
+        assert response.json()['results'][0]['image'].endswith(
+            recipe.image_variants['card']['jpeg']
+        ), (
+            'Проверьте, что в ленте рецептов используется вариант card'
+        )
+        response = user_client.get(f'{self.recipes_url}{recipe.id}/')
+        assert response.json()['image'].endswith(
+            recipe.image_variants['full']['jpeg']
+        ), (
+            'Проверьте, что на странице рецепта используется вариант full'
+        )
+
+        response = user_client.post(
+            reverse('favorites-list', kwargs={'recipe_id': recipe.id})
+        )
+        assert response.json()['image'].endswith(
+            recipe.image_variants['thumbnail']['jpeg']
+        ), (
+            'Проверьте, что в кратком представлении рецепта используется '
+            'уменьшенная картинка'
+        )
+
+    def get_image_content(self, color):
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10), color).save(buffer, 'PNG')
+        return ContentFile(buffer.getvalue())
+
+    def test_recipe_image_outdated_processing(
+            self, recipe_1, mock_media, settings
+    ):
+        '''Проверка, что результат обработки заменённой картинки
+        отбрасывается'''
+        recipe_1.image.save('old.png', self.get_image_content('red'))
+        old_name = recipe_1.image.name
+        recipe_1.image.save('new.png', self.get_image_content('blue'))
+        process_recipe_image(recipe_1.id, old_name)
+        recipe_1.refresh_from_db()
+        assert recipe_1.image_variants == {}
+        settings.RECIPE_IMAGE_CLEANUP_GRACE_PERIOD = timedelta()
+        call_command('cleanupimages', stdout=StringIO())
+        assert [
+            name for _, _, names in os.walk(mock_media) for name in names
+        ] == [os.path.basename(recipe_1.image.name)], (
+            'Проверьте, что cleanupimages удаляет устаревшую картинку '
+            'и её варианты'
+        )
+
+    def test_recipe_image_deduplication(
+            self, user_client, ingredient_1, tag_1, mock_media, settings
+    ):
+        '''Проверка, что одинаковые картинки хранятся в одном файле,
+        а cleanupimages удаляет только файлы без ссылок из рецептов'''
+        def get_files():
+            return {
+                os.path.join(path, name)
+                for path, _, names in os.walk(mock_media)
+                for name in names
+            }
+
+        data = {
+            'ingredients': [{'id': ingredient_1.id, 'amount': 10}],
+            'tags': [tag_1.id],
+            'image': self.base_64_image,
+            'text': 'string',
+            'cooking_time': 1
+        }
+        recipe_ids = []
+        for index in range(2):
+            response = user_client.post(
+                self.recipes_url,
+                json.dumps({**data, 'name': f'DuplicateImageRecipe{index}'}),
+                content_type='application/json'
+            )
+            assert response.status_code == HTTPStatus.CREATED
+            recipe_ids.append(response.json()['id'])
+        files = get_files()
+        response = user_client.patch(
+            reverse('recipes-detail', kwargs={'pk': recipe_ids[0]}),
+            json.dumps({'image': self.base_64_image}),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        first_recipe, second_recipe = Recipe.objects.filter(
+            id__in=recipe_ids
+        ).order_by('id')
+        assert first_recipe.image_variants == second_recipe.image_variants
+        assert get_files() == files and len(files) == len({
+            name
+            for variant in first_recipe.image_variants.values()
+            for name in variant.values()
+        }), (
+            'Проверьте, что одинаковые картинки и варианты сохраняются '
+            'в одном файле'
+        )
+
+        call_command('cleanupimages', stdout=StringIO())
+        assert get_files() == files, (
+            'Проверьте, что cleanupimages не удаляет недавно сохранённые '
+            'файлы'
+        )
+        settings.RECIPE_IMAGE_CLEANUP_GRACE_PERIOD = timedelta()
+        first_recipe.delete()
+        call_command('cleanupimages', '--dry-run', stdout=StringIO())
+        assert len(get_files()) == len(files)
+        call_command('cleanupimages', stdout=StringIO())
+        assert get_files() == files, (
+            'Проверьте, что cleanupimages не удаляет файлы, на которые '
+            'ссылается другой рецепт'
+        )
+        second_recipe.delete()
+        call_command('cleanupimages', stdout=StringIO())
+        assert not get_files(), (
+            'Проверьте, что cleanupimages удаляет файлы удалённых рецептов'
+        )
+
+    @pytest.mark.parametrize('image, max_size', (
+        ('data:text/plain;base64,' + base64.b64encode(b'text').decode(),
+         None),
+        ('data:image/jpeg;base64,' + base_64_image.split(',')[1], None),
+        ('data:image/png;base64,iVBORw0K!!!!', None),
+        ('data:image/png;base64,iVBORw0', None),
+        ('data:image/png', None),
+        (base_64_image, 10),
+    ))
+    def test_recipe_image_validation(
+            self, user_client, ingredient_1, tag_1, mock_media, settings,
+            image, max_size
+    ):
+        '''Проверка, что картинки неподдерживаемого типа, с неверным
+        содержимым или больше RECIPE_IMAGE_MAX_SIZE отклоняются'''
+        if max_size is not None:
+            settings.RECIPE_IMAGE_MAX_SIZE = max_size
+        data = {
+            'ingredients': [{'id': ingredient_1.id, 'amount': 10}],
+            'tags': [tag_1.id],
+            'image': image,
+            'name': 'InvalidImageRecipe',
+            'text': 'string',
+            'cooking_time': 1
+        }
+        response = user_client.post(
+            self.recipes_url, json.dumps(data),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'image' in response.json(), (
+            'Проверьте, что неверная картинка отклоняется с ошибкой '
+            'в поле image'
+        )
+        assert not Recipe.objects.exists()
+        assert not os.listdir(mock_media), (
+            'Проверьте, что отклонённая картинка не сохраняется'
+        )
+
+    def test_recipe_image_decoding_memory(self, settings):
+        '''Проверка, что картинка декодируется частями и пиковая
+        память не зависит от её размера'''
+        settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+        width = height = 1600
+        buffer = BytesIO()
+        Image.frombytes(
+            'RGB', (width, height), os.urandom(width * height * 3)
+        ).save(buffer, 'PNG', compress_level=1)
+        content = buffer.getvalue()
+        data = 'data:image/png;base64,' + base64.b64encode(content).decode()
+        del buffer
+
+        tracemalloc.start()
+        image = Base64ImageField().run_validation(data)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert image.size == len(content) and image.read() == content, (
+            'Проверьте, что картинка декодируется без искажений'
+        )
+        image.close()
+        assert peak_memory < len(content) / 4, (
+            'Проверьте, что base64 декодируется частями во временный '
+            f'файл: пиковая память {peak_memory} байт для картинки '
+            f'{len(content)} байт'
+        )
+
+    def test_process_images_command(self, recipe_1, recipe_2, mock_media):
+        '''Проверка создания вариантов картинок для уже загруженных
+        рецептов командой processimages'''
+        for recipe in (recipe_1, recipe_2):
+            recipe.image.save('legacy.png', ContentFile(
+                base64.b64decode(self.base_64_image.split(',')[1])
+            ))
+        call_command('processimages', stdout=StringIO())
+        for recipe in (recipe_1, recipe_2):
+            recipe.refresh_from_db()
+            assert set(recipe.image_variants) == set(
+                settings.RECIPE_IMAGE_VARIANTS
+            ), (
+                'Проверьте, что processimages создаёт варианты картинок '
+                'для рецептов без них'
+            )
+
+    def test_recipe_trending(
+            self, client, user, another_user, recipes, mock_media
+    ):
+        '''Проверка рейтинга популярных рецептов и его инкрементального
+        пересчёта командой refreshtrending'''
+        now = timezone.now()
+        for recipe, model, created in (
+            (recipes[0], Favorite, now - timedelta(days=6)),
+            (recipes[0], Purchase, now - timedelta(days=6)),
+            (recipes[1], Favorite, now - timedelta(hours=1)),
+            (recipes[2], Purchase, now - timedelta(hours=1)),
+        ):
+            model.objects.filter(pk=model.objects.create(
+                user=user, recipe=recipe
+            ).pk).update(created=created)
+        trending_url = reverse('recipes-trending')
+        call_command('refreshtrending', stdout=StringIO())
+
+        response_json = client.get(trending_url).json()
+        assert [recipe['id'] for recipe in response_json['results']] == [
+            recipes[1].id, recipes[2].id, recipes[0].id
+        ], (
+            f'Проверьте, что {trending_url} возвращает рецепты по '
+            'убыванию рейтинга с учётом давности добавления'
+        )
+
+        for model in (Favorite, Purchase):
+            model.objects.filter(pk=model.objects.create(
+                user=another_user, recipe=recipes[2]
+            ).pk).update(created=now - timedelta(minutes=30))
+        Favorite.objects.create(user=another_user, recipe=recipes[3])
+        call_command('refreshtrending', stdout=StringIO())
+
+        response_json = client.get(trending_url).json()
+        assert [recipe['id'] for recipe in response_json['results']] == [
+            recipes[2].id, recipes[1].id, recipes[0].id
+        ], (
+            'Проверьте, что команда refreshtrending учитывает только новые '
+            'добавления и откладывает самые свежие до следующего запуска'
+        )
+
+    def test_recipe_list_cursor_pagination(
+            self, user_client, recipes, tag_1, mock_media
+    ):
+        '''Проверка пагинации списка рецептов по курсору'''
+        Recipe.objects.filter(
+            pk__in=(recipes[1].id, recipes[2].id)
+        ).update(pub_date=recipes[1].pub_date)
+        expected_ids = list(
+            Recipe.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        url = self.recipes_url + f'?tags={tag_1.slug}&limit=2&cursor='
+
+        response_json = user_client.get(url + '&count=exact').json()
+        assert response_json['count'] == len(recipes), (
+            'Проверьте, что при пагинации по курсору с ?count=exact '
+            'возвращается количество рецептов'
+        )
+        pages = [response_json]
+        while pages[-1]['next']:
+            pages.append(user_client.get(pages[-1]['next']).json())
+        assert [
+            recipe['id'] for page in pages for recipe in page['results']
+        ] == expected_ids, (
+            'Проверьте, что пагинация по курсору возвращает все рецепты '
+            'без пропусков и повторов в порядке убывания даты публикации'
+        )
+        assert pages[0]['previous'] is None and pages[0]['count'] == 5
+
+        previous_json = user_client.get(pages[-1]['previous']).json()
+        assert previous_json['results'] == pages[-2]['results'], (
+            'Проверьте, что ссылка previous при пагинации по курсору '
+            'возвращает предыдущую страницу'
+        )
+
+        response = user_client.get(self.recipes_url + '?cursor=invalid')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что при неверном курсоре возвращается код 404'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRecipesQueryCount:
+
+    recipes_url = TestRecipesAPI.recipes_url
+    base_64_image = TestRecipesAPI.base_64_image
+
+    def test_recipe_list_query_count(
+            self, user_client, recipes, tag_1,
+            django_assert_max_num_queries, mock_media
+    ):
+        '''Проверка, что количество запросов к БД при получении списка
+        рецептов не зависит от количества рецептов на странице'''
+        with django_assert_max_num_queries(7):
+            response = user_client.get(
+                self.recipes_url + f'?tags={tag_1.slug}'
+            )
+        assert len(response.json()['results']) == len(recipes)
+
+    def test_recipe_retrieve_query_count(
+            self, user_client, recipes,
+            django_assert_max_num_queries, mock_media
+    ):
+        '''Проверка количества запросов к БД при получении рецепта'''
+        recipe_detail_url = reverse(
+            'recipes-detail', kwargs={'pk': recipes[0].id}
+        )
+        with django_assert_max_num_queries(6):
+            response = user_client.get(recipe_detail_url)
+        assert response.status_code == HTTPStatus.OK
+
+    def test_recipe_retrieve_not_modified(
+            self, user_client, recipes, user,
+            django_assert_max_num_queries, mock_media
+    ):
+        '''Проверка условного GET-запроса к рецепту по ETag'''
+        recipe = recipes[0]
+        recipe_detail_url = reverse(
+            'recipes-detail', kwargs={'pk': recipe.id}
+        )
+        response = user_client.get(recipe_detail_url)
+        etag = response['ETag']
+        assert not response.has_header('Last-Modified'), (
+            f'Проверьте, что ответ {recipe_detail_url} не содержит '
+            'заголовок Last-Modified: он не учитывает избранное и корзину'
+        )
+
+        with django_assert_max_num_queries(2):
+            response = user_client.get(
+                recipe_detail_url, HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к {recipe_detail_url} с актуальным '
+            'If-None-Match возвращает код 304 без сериализации рецепта'
+        )
+
+        Favorite.objects.create(user=user, recipe=recipe)
+        response = user_client.get(
+            recipe_detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что ETag рецепта {recipe_detail_url} учитывает '
+            'состояние рецепта для текущего пользователя'
+        )
+
+    def test_recipe_if_modified_since_after_favorite(
+            self, user_client, recipes, mock_media
+    ):
+        '''Проверка, что If-Modified-Since не возвращает устаревший
+        рецепт после добавления в избранное'''
+        recipe = recipes[0]
+        recipe_detail_url = reverse(
+            'recipes-detail', kwargs={'pk': recipe.id}
+        )
+        user_client.get(recipe_detail_url)
+        response = user_client.post(
+            reverse('favorites-list', kwargs={'recipe_id': recipe.id})
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.get(
+            recipe_detail_url,
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к {recipe_detail_url} '
+            'с If-Modified-Since возвращает актуальный рецепт'
+        )
+        assert response.json()['is_favorited']
+
+    def test_recipe_etag_tracks_counters(
+            self, user_client, another_user_client, recipes, mock_media
+    ):
+        '''Проверка, что ETag рецепта меняется, когда рецепт добавляет
+        в избранное другой пользователь'''
+        recipe = recipes[0]
+        recipe_detail_url = reverse(
+            'recipes-detail', kwargs={'pk': recipe.id}
+        )
+        etag = user_client.get(recipe_detail_url)['ETag']
+
+        response = another_user_client.post(
+            reverse('favorites-list', kwargs={'recipe_id': recipe.id})
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.get(
+            recipe_detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что ETag рецепта {recipe_detail_url} учитывает '
+            'счётчики избранного и корзин'
+        )
+        assert response.json()['favorites_count'] == 1
+
+    def test_recipe_create_query_count(
+            self, user_client, ingredient_1, ingredient_2,
+            tag_1, tag_2, django_assert_max_num_queries, mock_media
+    ):
+        '''Проверка количества запросов к БД при создании рецепта'''
+        data = {
+            'ingredients': [
+                {'id': ingredient_1.id, 'amount': 10},
+                {'id': ingredient_2.id, 'amount': 10},
+            ],
+            'tags': [tag_1.id, tag_2.id],
+            'image': self.base_64_image,
+            'name': 'string',
+            'text': 'string',
+            'cooking_time': 1
+        }
+        with django_assert_max_num_queries(16):
+            response = user_client.post(
+                self.recipes_url,
+                json.dumps(data),
+                content_type='application/json'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+
+    def test_recipe_write_query_count_independent_of_size(
+            self, user_client, recipes, unit, tag_1, mock_media
+    ):
+        '''Проверка, что количество запросов к БД при создании и
+        изменении рецепта не зависит от количества ингредиентов и тегов'''
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'BulkIngredient{index}', measurement_unit=unit)
+            for index in range(30)
+        )
+        Tag.objects.bulk_create(
+            Tag(name=f'BulkTag{index}', slug=f'bulk-tag-{index}',
+                color=f'#0000{index:02d}')
+            for index in range(5)
+        )
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        tag_ids = list(
+            Tag.objects.exclude(pk=tag_1.pk).values_list('id', flat=True)
+        )
+        query_counts = {}
+        for amount, tags, recipe in (
+            (1, tag_ids[:1], recipes[0]),
+            (30, tag_ids, recipes[1]),
+        ):
+            ingredients = [
+                {'id': ingredient_id, 'amount': 5}
+                for ingredient_id in ingredient_ids[:amount]
+            ]
+            data = {
+                'ingredients': ingredients,
+                'tags': tags,
+                'image': self.base_64_image,
+                'name': f'Recipe{amount}',
+                'text': 'string',
+                'cooking_time': 1
+            }
+            with CaptureQueriesContext(connection) as create_context:
+                response = user_client.post(
+                    self.recipes_url,
+                    json.dumps(data),
+                    content_type='application/json'
+                )
+            assert response.status_code == HTTPStatus.CREATED
+            assert len(response.json()['ingredients']) == amount
+            with CaptureQueriesContext(connection) as update_context:
+                response = user_client.patch(
+                    reverse('recipes-detail', kwargs={'pk': recipe.id}),
+                    json.dumps({'ingredients': ingredients, 'tags': tags}),
+                    content_type='application/json'
+                )
+            assert response.status_code == HTTPStatus.OK
+            query_counts[amount] = (
+                len(create_context.captured_queries),
+                len(update_context.captured_queries)
+            )
+        assert query_counts[1] == query_counts[30], (
+            'Проверьте, что ингредиенты и теги рецепта загружаются '
+            'одним запросом на модель при валидации, а не по одному '
+            f'(запросов для 1 и 30 ингредиентов: {query_counts})'
+        )
+
+    def test_recipe_partial_update_query_count(
+            self, user_client, recipes, ingredient_1, ingredient_2,
+            tag_1, tag_2, django_assert_max_num_queries, mock_media
+    ):
+        '''Проверка количества запросов к БД при изменении рецепта'''
+        recipe_detail_url = reverse(
+            'recipes-detail', kwargs={'pk': recipes[0].id}
+        )
+        data = {
+            'ingredients': [
+                {'id': ingredient_1.id, 'amount': 11},
+                {'id': ingredient_2.id, 'amount': 11},
+            ],
+            'tags': [tag_1.id, tag_2.id],
+            'name': 'another_string',
+        }
+        with django_assert_max_num_queries(19):
+            response = user_client.patch(
+                recipe_detail_url,
+                json.dumps(data),
+                content_type='application/json'
+            )
+        assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,95 @@
+import sqlite3
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.db import connection, connections
+from django.urls import reverse
+
+from recipes.models import Tag
+from users.models import Subscription
+
+REPLICA_ALIAS = 'replica_1'
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    '''Подключает файл SQLite как реплику и возвращает функцию,
+    которая копирует в него текущее состояние основной БД'''
+    if connection.vendor != 'sqlite':
+        pytest.skip('Реплика моделируется копией базы SQLite')
+    path = tmp_path / 'replica.sqlite3'
+    connections.databases[REPLICA_ALIAS] = {
+        **connections.databases['default'], 'NAME': str(path), 'TEST': {}
+    }
+    settings.DATABASE_REPLICAS = [REPLICA_ALIAS]
+
+    def replicate():
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    yield replicate
+    connections[REPLICA_ALIAS].close()
+    del connections[REPLICA_ALIAS]
+    del connections.databases[REPLICA_ALIAS]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReadReplicas:
+
+    def test_safe_requests_read_from_replica(
+            self, user_client, user, another_user, replica
+    ):
+        '''Проверка, что чтение каталога идёт из реплики, а остальных
+        эндпоинтов — из основной БД'''
+        replica()
+        Tag.objects.create(name='ReplicaTag', color='#000000', slug='tag')
+        Subscription.objects.create(user=user, author=another_user)
+
+        response = user_client.get(reverse('tags-list'))
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == [], (
+            'Проверьте, что GET-запрос к списку тегов читает из реплики'
+        )
+        response = user_client.get(reverse('users-subscriptions'))
+        assert response.json()['count'] == 1, (
+            'Проверьте, что эндпоинты не из DATABASE_REPLICA_ENDPOINTS '
+            'читают из основной БД'
+        )
+        assert settings.DATABASE_PRIMARY_COOKIE not in response.cookies
+
+        replica()
+        response = user_client.get(reverse('tags-list'))
+        assert len(response.json()) == 1
+
+    def test_read_own_writes_after_write(
+            self, user_client, recipe_1, replica
+    ):
+        '''Проверка, что после записи клиент читает из основной БД
+        в течение DATABASE_PRIMARY_STICKY_SECONDS'''
+        replica()
+        recipe_url = reverse('recipes-detail', kwargs={'pk': recipe_1.id})
+        response = user_client.post(
+            reverse('favorites-list', kwargs={'recipe_id': recipe_1.id})
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        cookie = response.cookies.get(settings.DATABASE_PRIMARY_COOKIE)
+        assert cookie is not None and cookie['max-age'] == (
+            settings.DATABASE_PRIMARY_STICKY_SECONDS
+        ), (
+            'Проверьте, что после записи клиент получает cookie '
+            'DATABASE_PRIMARY_COOKIE'
+        )
+        assert user_client.get(recipe_url).json()['is_favorited'], (
+            'Проверьте, что после записи клиент видит свои изменения'
+        )
+
+        del user_client.cookies[settings.DATABASE_PRIMARY_COOKIE]
+        assert not user_client.get(recipe_url).json()['is_favorited'], (
+            'Проверьте, что после окончания закрепления за основной БД '
+            'рецепты снова читаются из реплики'
+        )
@@ -0,0 +1,53 @@
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+
+from recipes.models import Favorite, IngredientRecipe, Purchase, Recipe
+from users.models import Subscription, User
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSeedBench:
+
+    def test_seedbench(self, user):
+        '''Проверка создания синтетических данных командой seedbench'''
+        call_command(
+            'seedbench', users=20, recipes=100, favorites=300, purchases=100,
+            subscriptions=50, seed=0, stdout=StringIO()
+        )
+
+        assert User.objects.count() == 21
+        assert Recipe.objects.count() == 100
+        assert IngredientRecipe.objects.count() >= 100
+        assert Favorite.objects.count() >= 250, (
+            'Проверьте, что seedbench создаёт близкое к заданному '
+            'количество добавлений в избранное'
+        )
+        assert Purchase.objects.exists() and Subscription.objects.exists()
+        assert not Subscription.objects.filter(user=F('author')).exists()
+        assert not Recipe.objects.filter(author=user).exists(), (
+            'Проверьте, что seedbench не изменяет существующие данные'
+        )
+        assert Recipe.objects.values('pub_date').distinct().count() > 1, (
+            'Проверьте, что даты публикации рецептов распределены '
+            'по периоду SEED_BENCH_PERIOD'
+        )
+        recipe = Recipe.objects.order_by('-favorites_count').first()
+        assert recipe.favorites_count == recipe.favorite_set.count(), (
+            'Проверьте, что seedbench пересчитывает счётчики рецептов'
+        )
+        bench_user = User.objects.exclude(pk=user.pk).first()
+        assert authenticate(
+            username=bench_user.username,
+            password=settings.SEED_BENCH_PASSWORD
+        ) == bench_user
+
+    def test_seedbench_invalid_options(self):
+        '''Проверка ошибки при недопустимых параметрах seedbench'''
+        with pytest.raises(CommandError):
+            call_command('seedbench', users=0, stdout=StringIO())
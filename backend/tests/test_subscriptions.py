@@ -218,3 +218,60 @@ class TestSubscriptionsAPI:
             'Проверьте, что DELETE-запрос автора к '
             f'`{subscription_delete_url}` удаляет подписку'
         )
+
+    def test_subscription_list_pagination_and_recipes_limit(
+            self, user_client, user, django_user_model,
+            tag_1, django_assert_max_num_queries
+    ):
+        '''Проверка пагинации и параметра recipes_limit для эндпоинта
+        users/subscriptions/, а также количества запросов к БД'''
+        for author_index in range(3):
+            author = django_user_model.objects.create_user(
+                email=f'author{author_index}@mail.ru',
+                username=f'Author{author_index}',
+                first_name='AuthorFirstName',
+                last_name='AuthorLastName',
+                password='1234567',
+            )
+            Subscription.objects.create(user=user, author=author)
+            for recipe_index in range(3):
+                author.recipes.create(
+                    name=f'AuthorRecipe{recipe_index}',
+                    text='AuthorRecipeText',
+                    cooking_time=10,
+                    image='recipe/images/temp.png',
+                )
+
+        with django_assert_max_num_queries(4):
+            response = user_client.get(
+                self.subscriptions_url + '?limit=2&recipes_limit=2'
+            )
+        assert response.status_code == HTTPStatus.OK
+
+        response_json = response.json()
+        assert response_json['count'] == 3
+        assert len(response_json['results']) == 2, (
+            f'Проверьте, что эндпоинт `{self.subscriptions_url}` '
+            'возвращает только подписки текущей страницы'
+        )
+        for subscription in response_json['results']:
+            assert subscription['recipes_count'] == 3
+            assert len(subscription['recipes']) == 2, (
+                f'Проверьте, что эндпоинт `{self.subscriptions_url}` '
+                'ограничивает количество рецептов параметром recipes_limit'
+            )
+            assert [
+                recipe['name'] for recipe in subscription['recipes']
+            ] == ['AuthorRecipe2', 'AuthorRecipe1']
+
+        response = user_client.get(self.subscriptions_url + '?recipes_limit=0')
+        for subscription in response.json()['results']:
+            assert len(subscription['recipes']) == 3, (
+                'Проверьте, что recipes_limit=0 не ограничивает '
+                'количество рецептов'
+            )
+
+        invalid_response = user_client.get(
+            self.subscriptions_url + '?recipes_limit=-1'
+        )
+        assert invalid_response.status_code == HTTPStatus.BAD_REQUEST
@@ -61,6 +61,10 @@ class TestTagsAPI:
             response_json[0],
             self.tags_list_url
         )
+        assert set(response_json[0]) == set(tag_fields), (
+            f'Убедитесь, что в ответ на GET-запрос к `{self.tags_list_url}` '
+            'не попадают служебные поля тегов'
+        )
 
     def test_acces_not_authenticated_tags_detail(self, client, tag_1):
         '''
@@ -103,3 +107,33 @@ class TestTagsAPI:
         check_only_safe_methods_allowed(
             client, reverse('tags-detail', kwargs={'pk': tag_1.id})
         )
+
+    def test_tags_list_not_modified(
+        self,
+        client,
+        tag_1,
+        tag_2,
+        django_assert_max_num_queries
+    ):
+        '''Проверка условного GET-запроса к списку тегов по ETag'''
+        etag = client.get(self.tags_list_url)['ETag']
+
+        with django_assert_max_num_queries(1):
+            response = client.get(
+                self.tags_list_url, HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к {self.tags_list_url} с актуальным '
+            'If-None-Match возвращает код 304 без сериализации тегов'
+        )
+
+        tag_2.delete()
+        response = client.get(self.tags_list_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что ETag списка тегов {self.tags_list_url} '
+            'меняется после удаления тега'
+        )
+        assert not response.has_header('Last-Modified'), (
+            f'Проверьте, что ответ {self.tags_list_url} не содержит '
+            'заголовок Last-Modified: он не меняется после удаления тега'
+        )